@@ -1,3 +1,4 @@
-from compmec.nurbs.basefunctions import SplineBaseFunction
+from compmec.nurbs.basefunctions import SplineBaseFunction, RationalBaseFunction
 from compmec.nurbs.spaceu import VectorU
-from compmec.nurbs.curves import SplineCurve, SplineXYFunction
\ No newline at end of file
+from compmec.nurbs.curves import SplineCurve, SplineCurveBatch, RationalCurve, SplineXYFunction, RationalXYFunction
+from compmec.nurbs.surfaces import SplineSurface, RationalSurface
\ No newline at end of file
@@ -1,8 +1,11 @@
 import numpy as np
 from numpy import linalg as la
-from typing import Iterable, Optional
-from compmec.nurbs import SplineBaseFunction
+from typing import Iterable, Optional, Union
+from compmec.nurbs import SplineBaseFunction, VectorU
+from compmec.nurbs.basefunctions import SparseBasis
 from compmec.nurbs.curves import SplineCurve
+from compmec.nurbs.solvers import banded_cholesky, banded_cholesky_solve, lsqr
+from compmec.nurbs.fitting import SplineFitter
 
 def transform2U(u: Iterable[float], n: float, p: float, algorithm: int = 1):
     U = np.zeros(n+p+1)
@@ -12,39 +15,66 @@ def transform2U(u: Iterable[float], n: float, p: float, algorithm: int = 1):
     else:
         ValueError("Algorithm is nod valid!")
     U[n:] = 1
-    return U
+    return VectorU.trusted(U)
 
-def curve_control_points(L: np.ndarray, points: np.ndarray):
+def curve_control_points(L: Union[np.ndarray, SparseBasis], points: np.ndarray, weights: Optional[Iterable[float]] = None, method: str = "cholesky"):
     """
     t is a vector of the position of each point.
         path(t[i]) = points[i]
     points is a 2D numpy matrix of shape (npts, dim)
+    L can be the dense matrix or the SparseBasis
+    All the dimensions are solved with only one factorization
     """
-    n = L.shape[0]
     points = np.array(points).T
-    npts, dim = points.shape
-    controlpts = np.zeros((n, dim))
-    for i in range(dim):
-        controlpts[:, i] = compute_control_points(L, points[:, i])
-    return controlpts
+    return compute_control_points(L, points, weights, method)
 
-def curve_spline(t: Iterable[float], points: np.ndarray, p: Optional[int] = None, n: Optional[int] = None):
+def curve_spline(t: Iterable[float], points: np.ndarray, p: Optional[int] = None, n: Optional[int] = None, weights: Optional[Iterable[float]] = None, method: str = "cholesky"):
     t = (t - min(t))/(max(t) - min(t))  # Normalize
     U = transform2U(t, n, p)
     N = SplineBaseFunction(U)
-    L = N(t)
-    controlpts = curve_control_points(L, points)
+    L = N(t, sparse=True)
+    controlpts = curve_control_points(L, points, weights, method)
     return SplineCurve(N, controlpts)
 
 
-def function_control_points(x: Iterable[float], y: Iterable[float], p: Optional[int] = None, n: Optional[int] = None):
+def function_control_points(x: Iterable[float], y: Iterable[float], p: Optional[int] = None, n: Optional[int] = None, weights: Optional[Iterable[float]] = None, method: str = "cholesky"):
     ubar = (x-x[0])/(x[-1]-x[0])
     U = transform2U(ubar, n, p)
+    if method == "cholesky":
+        return SplineFitter(U, ubar, weights).fit(y)
     N = SplineBaseFunction(U)
-    L = N(ubar)
-    controlpts = compute_control_points(L, y)
+    L = N(ubar, sparse=True)
+    controlpts = compute_control_points(L, y, weights, method)
     return controlpts
 
 
-def compute_control_points(L, y): 
-    return la.solve(L @ L.T, L @ y)
\ No newline at end of file
+def compute_control_points(L: Union[np.ndarray, SparseBasis], y: Iterable[float], weights: Optional[Iterable[float]] = None, method: str = "cholesky", tol: float = 1e-12, maxiter: Optional[int] = None):
+    """
+    Minimizes sum_m weights[m] * |L[:, m] @ X - y[m]|^2
+    y can be a vector or a matrix of shape (npts, dim)
+    If L is a SparseBasis, the method can be
+        "cholesky": banded Cholesky of the normal equations, O(n*p^2)
+        "lsqr": iterative LSQR, which doesn't square the condition number
+    LSQR is applied to the basis with the columns scaled to unit norm,
+    and stops with the given tol and maxiter, see solvers.lsqr
+    """
+    y = np.array(y, dtype="float64")
+    if not isinstance(L, SparseBasis):
+        L = np.array(L)
+        W = np.ones(L.shape[1]) if weights is None else np.array(weights, dtype="float64")
+        return la.solve((L * W) @ L.T, (L * W) @ y)
+    W = np.ones(L.shape[1]) if weights is None else np.array(weights, dtype="float64")
+    if method == "cholesky":
+        Gb = L.banded_gram(W)
+        Wy = W.reshape((-1, ) + (1, )*(y.ndim-1)) * y
+        return banded_cholesky_solve(banded_cholesky(Gb), L.dot(Wy))
+    if method == "lsqr":
+        sqrtW = np.sqrt(W).reshape((-1, 1))
+        y2 = y.reshape(len(y), -1)
+        norms = np.sqrt(L.banded_gram(W)[0])
+        D = (1 / np.where(norms == 0, 1, norms)).reshape((-1, 1))
+        matvec = lambda Z: sqrtW * L.tdot(D * Z)
+        rmatvec = lambda Y: D * L.dot(sqrtW * Y)
+        X = D * lsqr(matvec, rmatvec, sqrtW * y2, tol, maxiter)
+        return X.reshape((L.shape[0], ) + y.shape[1:])
+    raise ValueError(f"Method {method} is not valid")
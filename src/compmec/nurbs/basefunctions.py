@@ -1,6 +1,12 @@
 import numpy as np
-from typing import Iterable, Any, Optional, Union, Tuple, Type
-from compmec.nurbs.spaceu import VectorU 
+import hashlib
+from collections import OrderedDict
+from typing import Iterable, Any, Callable, List, Optional, Union, Tuple, Type
+from compmec.nurbs.spaceu import VectorU
+from compmec.nurbs.solvers import BandedMatrix
+from compmec.nurbs.parallel import chunk_map
+from concurrent.futures import Executor
+from functools import partial
 
 def N(i: int, j: int, k: int, u: float, U: VectorU) -> float:
     """
@@ -38,28 +44,340 @@ def N(i: int, j: int, k: int, u: float, U: VectorU) -> float:
     result = factor1 * N(i, j-1, k, u, U) + factor2 * N(i+1, j-1, k, u, U)
     return result
 
+def N_span(k: int, j: int, u: float, U: VectorU) -> np.ndarray:
+    """
+    Returns the values of [N_{k-j, j}(u), ..., N_{k, j}(u)]
+    They are the only j+1 functions that can be non-zero in [u_{k}, u_{k+1}]
+    Uses the triangular table of the algorithm A2.2 of the NURBS Book,
+    which costs O(j^2) instead of the O(2^j) of the recursive N
+    The interval [u_{k}, u_{k+1}] must not be empty
+    """
+    values = [1.0] + [0.0]*j
+    left = [0.0]*(j+1)
+    right = [0.0]*(j+1)
+    for z in range(1, j+1):
+        left[z] = u - U[k+1-z]
+        right[z] = U[k+z] - u
+        saved = 0.0
+        for r in range(z):
+            temp = values[r]/(right[r+1] + left[z-r])
+            values[r] = saved + right[r+1]*temp
+            saved = left[z-r]*temp
+        values[z] = saved
+    return np.array(values)
+
+def N_spans(j: int, u: Iterable[float], U: VectorU) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized version of N_span for an array of M parameters
+    Returns (spans, values) where spans[m] = k is the interval of u[m]
+    and values[m] = [N_{k-j, j}(u[m]), ..., N_{k, j}(u[m])]
+    The loops are only over the degree, the parameters are treated as arrays
+    """
+    u = np.array(u, dtype="float64", ndmin=1)
+    knots = U.array
+    spans = np.minimum(U.spot(u), U.n-1)
+    M = len(u)
+    values = np.zeros((M, j+1))
+    values[:, 0] = 1
+    left = np.zeros((M, j+1))
+    right = np.zeros((M, j+1))
+    for z in range(1, j+1):
+        left[:, z] = u - knots[spans+1-z]
+        right[:, z] = knots[spans+z] - u
+        saved = np.zeros(M)
+        for r in range(z):
+            temp = values[:, r]/(right[:, r+1] + left[:, z-r])
+            values[:, r] = saved + right[:, r+1]*temp
+            saved = left[:, z-r]*temp
+        values[:, z] = saved
+    return spans, values
+
+def N_spans_derivatives(j: int, order: int, u: Iterable[float], U: VectorU) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the j+1 non-zero functions of N_spans and their derivatives
+    up to the given order in only one pass, by the algorithm A2.3 of the NURBS Book
+    Returns (spans, ders), with ders[m, d] the d-th derivative of values[m]
+    Costs O(j^2 + order*j) for each u, vectorized over all the parameters
+    """
+    u = np.array(u, dtype="float64", ndmin=1)
+    knots = U.array
+    spans = np.minimum(U.spot(u), U.n-1)
+    M = len(u)
+    ndu = np.zeros((M, j+1, j+1))
+    ndu[:, 0, 0] = 1
+    left = np.zeros((M, j+1))
+    right = np.zeros((M, j+1))
+    for z in range(1, j+1):
+        left[:, z] = u - knots[spans+1-z]
+        right[:, z] = knots[spans+z] - u
+        saved = np.zeros(M)
+        for r in range(z):
+            ndu[:, z, r] = right[:, r+1] + left[:, z-r]
+            temp = ndu[:, r, z-1]/ndu[:, z, r]
+            ndu[:, r, z] = saved + right[:, r+1]*temp
+            saved = left[:, z-r]*temp
+        ndu[:, z, z] = saved
+    ders = np.zeros((M, order+1, j+1))
+    ders[:, 0, :] = ndu[:, :, j]
+    a = np.zeros((M, 2, j+1))
+    for r in range(j+1):
+        s1, s2 = 0, 1
+        a[:, 0, 0] = 1
+        for k in range(1, min(order, j)+1):
+            d = np.zeros(M)
+            rk, pk = r-k, j-k
+            if r >= k:
+                a[:, s2, 0] = a[:, s1, 0]/ndu[:, pk+1, rk]
+                d = a[:, s2, 0]*ndu[:, rk, pk]
+            j1 = 1 if rk >= -1 else -rk
+            j2 = k-1 if r-1 <= pk else j-r
+            for z in range(j1, j2+1):
+                a[:, s2, z] = (a[:, s1, z] - a[:, s1, z-1])/ndu[:, pk+1, rk+z]
+                d = d + a[:, s2, z]*ndu[:, rk+z, pk]
+            if r <= pk:
+                a[:, s2, k] = -a[:, s1, k-1]/ndu[:, pk+1, r]
+                d = d + a[:, s2, k]*ndu[:, r, pk]
+            ders[:, k, r] = d
+            s1, s2 = s2, s1
+    factor = j
+    for k in range(1, min(order, j)+1):
+        ders[:, k, :] *= factor
+        factor *= j-k
+    return spans, ders
+
 def R(i: int, j: int, k: int, u: float, U: VectorU, w: Iterable[float]) -> float:
     """
     Returns the value of R_{ij}(u) in the interval [u_{k}, u_{k+1}]
+        R_{ij}(u) = w_i * N_{ij}(u) / sum_z w_z * N_{zj}(u)
+    Only the j+1 non-zero values of N_span are needed for the denominator
     """
-    Niju = N(i, j, k, u, U)
-    if Niju == 0:
+    k = min(int(k), U.n-1)
+    if i < k-j or k < i:
         return 0
-    n = len(w)
-    soma = 0
-    for z in range(n):
-        soma += w[z] * N(z, j, k, u, U)
-    return w[i] * Niju / soma
+    values = np.array(w[k-j:k+1]) * N_span(k, j, u, U)
+    return values[i-k+j] / np.sum(values)
+
+
+class SparseBasis(object):
+    """
+    Compact form of a basis matrix L of shape (n, M)
+    Each column m has non-zero values only in the rows
+        starts[m], starts[m]+1, ..., starts[m]+width-1
+    and these values are stored in values[m]
+    So the memory is O(M*width) instead of O(n*M)
+    """
+
+    def __init__(self, n: int, starts: Iterable[int], values: np.ndarray):
+        self._n = int(n)
+        self._starts = np.array(starts, dtype="int64")
+        self._values = np.array(values, dtype="float64")
+        if self._values.ndim != 2 or self._values.shape[0] != len(self._starts):
+            raise ValueError("values must be a matrix of shape (M, width)")
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self._n, len(self._starts))
 
+    @property
+    def starts(self) -> np.ndarray:
+        return self._starts
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def width(self) -> int:
+        return self._values.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self._starts.nbytes + self._values.nbytes
+
+    def rows(self) -> np.ndarray:
+        """
+        Returns the (M, width) matrix of the row of each value
+        """
+        return self._starts[:, None] + np.arange(self.width)
+
+    def toarray(self) -> np.ndarray:
+        n, M = self.shape
+        result = np.zeros((n, M))
+        result[self.rows(), np.arange(M)[:, None]] = self._values
+        return result
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        result = self.toarray()
+        return result if dtype is None else result.astype(dtype)
+
+    def dot(self, y: np.ndarray) -> np.ndarray:
+        """
+        Computes L @ y, with y of shape (M, ...)
+        The columns are sorted by their starts, so the columns with the
+        same rows are contiguous groups. If y has few columns, for each of
+        the width rows of the block, np.add.reduceat sums each group.
+        Else each group is one small matrix product of BLAS
+        """
+        y = np.array(y, dtype="float64")
+        n, M = self.shape
+        y2 = y.reshape(M, -1)
+        result = np.zeros((n, y2.shape[1]))
+        if M == 0:
+            return result.reshape((n, ) + y.shape[1:])
+        starts, values = self._starts, self._values
+        if np.any(starts[1:] < starts[:-1]):
+            order = np.argsort(starts, kind="stable")
+            starts, values, y2 = starts[order], values[order], y2[order]
+        firsts = np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+        if y2.shape[1] <= self.width:
+            for c in range(self.width):
+                result[starts[firsts] + c] += np.add.reduceat(values[:, c, None] * y2, firsts, axis=0)
+        else:
+            for a, b in zip(firsts, np.append(firsts[1:], M)):
+                result[starts[a]:starts[a]+self.width] += values[a:b].T @ y2[a:b]
+        return result.reshape((n, ) + y.shape[1:])
+
+    def tdot(self, P: np.ndarray) -> np.ndarray:
+        """
+        Computes L.T @ P, with P of shape (n, ...)
+        """
+        P = np.array(P, dtype="float64")
+        n, M = self.shape
+        P2 = P.reshape(n, -1)
+        rows = self.rows()
+        result = np.zeros((M, P2.shape[1]))
+        for c in range(self.width):
+            result += self._values[:, c, None] * P2[rows[:, c]]
+        return result.reshape((M, ) + P.shape[1:])
+
+    def banded_gram(self, weights: Optional[Iterable[float]] = None) -> np.ndarray:
+        """
+        Computes G = L @ diag(weights) @ L.T in the lower banded form
+            Gb[d, i] = G[i+d, i], for d = 0, ..., width-1
+        """
+        n, M = self.shape
+        weights = np.ones(M) if weights is None else np.array(weights, dtype="float64")
+        rows = self.rows()
+        result = np.zeros((self.width, n))
+        for a in range(self.width):
+            for b in range(a, self.width):
+                products = weights * self._values[:, a] * self._values[:, b]
+                result[b-a] += np.bincount(rows[:, a], weights=products, minlength=n)
+        return result
+
+
+class LRUCache(object):
+    """
+    LRU cache of arrays, or of tuples and objects made of arrays,
+    whose memory is bounded: the least recently used values are removed
+    while the memory of the values is bigger than maxbytes.
+    The memory of a value is the sum of the nbytes of its parts.
+    The returned arrays are read-only, since they are shared
+    """
+
+    def __init__(self, maxbytes: int = 2**27):
+        self.__values = OrderedDict()
+        self.__nbytes = 0
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxbytes(self) -> int:
+        return self.__maxbytes
+
+    @maxbytes.setter
+    def maxbytes(self, value: int):
+        value = int(value)
+        if value < 0:
+            raise ValueError("The memory cap must be positive")
+        self.__maxbytes = value
+        self.__shrink()
+
+    @property
+    def nbytes(self) -> int:
+        return self.__nbytes
+
+    def __len__(self) -> int:
+        return len(self.__values)
+
+    @staticmethod
+    def sizeof(value: Any) -> int:
+        if isinstance(value, tuple):
+            return sum(LRUCache.sizeof(item) for item in value)
+        return int(getattr(value, "nbytes", 0))
+
+    @staticmethod
+    def freeze(value: Any) -> None:
+        if isinstance(value, tuple):
+            for item in value:
+                LRUCache.freeze(item)
+        elif isinstance(value, np.ndarray):
+            value.setflags(write=False)
+
+    def __shrink(self) -> None:
+        while self.__nbytes > self.__maxbytes:
+            _, old = self.__values.popitem(last=False)
+            self.__nbytes -= self.sizeof(old)
+
+    def get(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the value of the key, calling compute if it's not in the cache
+        """
+        if key in self.__values:
+            self.hits += 1
+            self.__values.move_to_end(key)
+            return self.__values[key]
+        self.misses += 1
+        value = compute()
+        self.freeze(value)
+        nbytes = self.sizeof(value)
+        if nbytes <= self.maxbytes:
+            self.__values[key] = value
+            self.__nbytes += nbytes
+            self.__shrink()
+        return value
+
+    def clear(self) -> None:
+        self.__values.clear()
+        self.__nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self),
+                "nbytes": self.nbytes, "maxbytes": self.maxbytes}
+
+
+class BasisCache(LRUCache):
+    """
+    LRU cache of the non-zero blocks (spans, values) of the basis functions,
+    keyed by the knot vector, the degree j, the derivative order and the
+    parameters u. It's used only by the base functions it's given to:
+        N.cache = BasisCache(maxbytes)
+    and it can be shared between many base functions.
+    The least recently used blocks are removed while the memory of the
+    blocks is bigger than maxbytes, see LRUCache
+    """
+
+    @staticmethod
+    def key(kind: str, U: VectorU, j: int, order: int, u: np.ndarray) -> Tuple:
+        """
+        The kind tells what is stored: "block" for (spans, values) of shape (M, j+1),
+        "derivs" for (spans, ders) of shape (M, order+1, j+1)
+        """
+        u = np.array(u, dtype="float64")
+        return (kind, U, j, order, u.shape, hashlib.sha1(u.tobytes()).hexdigest())
 
 
 class EvaluationClass(object):
 
     def __init__(self, U: Iterable[float], p: int, tup: Union[None, int, slice, Tuple]= None, A: Optional[np.ndarray]=None):
-        self._U = VectorU(U)
+        self._U = U if isinstance(U, VectorU) else VectorU(U)
         self._p = p
         self.__initialize_tup(tup)
         self.A = A
+        self.cache = None
 
     def __initialize_tup(self, tup):
         if tup is None:
@@ -141,27 +459,33 @@ class EvaluationClass(object):
         self._p = int(value)
 
     @A.setter
-    def A(self, value: np.ndarray):
+    def A(self, value: Union[None, np.ndarray, BandedMatrix]):
+        """
+        A is kept as a BandedMatrix: None is the identity, which costs O(n)
+        """
         if value is None:
-            self._A = np.eye(self.U.n)
-        else:
+            value = BandedMatrix.identity(self.U.n)
+        elif not isinstance(value, BandedMatrix):
             value = np.array(value)
             if value.ndim != 2 or value.shape[0] != self.U.n:
                 raise ValueError("The given numpy array must be a square matrix")
-            self._A = np.array(value)
+            value = BandedMatrix.fromarray(value)
+        if value.n != self.U.n:
+            raise ValueError("The given matrix must be a square matrix of size n")
+        self._A = value
 
 
-    def __validate_evaluation_u(self, u: np.ndarray):
-        U = self._U
-        minU = np.min(U)
-        maxU = np.max(U)
+    def _validate_evaluation_u(self, u: np.ndarray):
+        u = np.array(u)
+        minU = self._U.umin
+        maxU = self._U.umax
         if not np.all((minU <= u) * (u <= maxU)):
             raise Exception(f"All values of u must be inside the interval [{minU}, {maxU}]")
-        if np.array(u).ndim > 1:
+        if u.ndim > 1:
             raise ValueError("For the moment we can only evaluate scalars or 1D array")
         
 
-    def __treat_input(self, u: Union[float, np.ndarray]) -> np.ndarray:
+    def _treat_input(self, u: Union[float, np.ndarray]) -> np.ndarray:
         try:
             len(u)
         except Exception as e:
@@ -172,7 +496,7 @@ class EvaluationClass(object):
         """
         In this function, u is a vector, while i is a range
         """
-        u = self.__treat_input(u)
+        u = self._treat_input(u)
         r = np.zeros((self.n, len(u)))
         for w, uw in enumerate(u):
             k = self._U.spot(uw)
@@ -183,11 +507,71 @@ class EvaluationClass(object):
     def compute_all(self, u: np.ndarray) -> np.ndarray:
         return self.A @ self.compute_matrix(u)
 
-    def __call__(self, u: Union[float, np.ndarray]) -> np.ndarray:
-        self.__validate_evaluation_u(u)
-        u = self.__treat_input(u)
-        result = self.A @ self.compute_matrix(u)
-        return result[self.i]
+    def compute_block(self, u: Union[float, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Must return (spans, values), with values[m] the j+1
+        non-zero values of the column m of compute_matrix
+        """
+        raise NotImplementedError("This function must be overwritten")
+
+    def compute_sparse(self, u: Union[float, np.ndarray]) -> SparseBasis:
+        """
+        Computes A @ compute_matrix(u) as a SparseBasis.
+        As A is banded, each column has at most j+1+lower+upper non-zero values.
+        The rows keep their index, the rows outside i are set to zero
+        """
+        spans, values = self.compute_block(u)
+        return self.block_to_sparse(spans, values)
+
+    def block_to_sparse(self, spans: np.ndarray, values: np.ndarray) -> SparseBasis:
+        """
+        Applies A on the block (spans, values) of the j+1 non-zero
+        functions of each u and returns the SparseBasis
+        """
+        j, n = self.j, self.n
+        lower, upper = self.A.lower, self.A.upper
+        width = min(j+1+lower+upper, n)
+        starts = np.clip(spans-j-upper, 0, n-width)
+        rows = starts[:, None] + np.arange(width)
+        if self.A.isidentity:
+            values = np.array(values)
+        elif lower == 0 and upper == 0:
+            values = self.A.diagonal()[rows] * values
+        else:
+            cols = spans[:, None] - j + np.arange(j+1)
+            submatrices = self.A.entries(rows[:, :, None], cols[:, None, :])
+            values = np.einsum("mwr,mr->mw", submatrices, values)
+        values[~self.__selected(rows)] = 0
+        return SparseBasis(n, starts, values)
+
+    def __selected(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Tells if each row is in the range i
+        """
+        i = self.i
+        if len(i) == 0:
+            return np.zeros(rows.shape, dtype="bool")
+        inside = (min(i[0], i[-1]) <= rows) & (rows <= max(i[0], i[-1]))
+        return inside & ((rows - i[0]) % i.step == 0)
+
+    def __call__(self, u: Union[float, np.ndarray], sparse: bool = False) -> Union[np.ndarray, SparseBasis]:
+        """
+        If sparse, returns a SparseBasis instead of the dense matrix.
+        Only the rows in i are computed, from the non-zero block of each u
+        """
+        self._validate_evaluation_u(u)
+        u = self._treat_input(u)
+        L = self.compute_sparse(u)
+        if sparse:
+            return L
+        result = np.zeros((len(self.i), len(u)))
+        if len(self.i) == 0:
+            return result
+        rows = L.rows()
+        cols = np.arange(len(u))[:, None] + np.zeros(L.width, dtype="int64")
+        selected = self.__selected(rows)
+        result[(rows[selected] - self.i[0]) // self.i.step, cols[selected]] = L.values[selected]
+        return result
 
 
 class BaseFunction(object):
@@ -205,6 +589,7 @@ class BaseFunction(object):
         else:
             self._U = VectorU(U)
         self._p = self._U.p
+        self.cache = None
 
     @property
     def p(self) -> int:
@@ -218,6 +603,19 @@ class BaseFunction(object):
     def U(self) -> Tuple[float]:
         return tuple(self._U)
 
+    @property
+    def cache(self) -> Optional[BasisCache]:
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: Optional[BasisCache]):
+        """
+        Opt-in memoization of the evaluations, see BasisCache
+        """
+        if value is not None and not isinstance(value, BasisCache):
+            raise TypeError(f"The cache must be a BasisCache, received {type(value)}")
+        self._cache = value
+
     @property
     def evaluationClass(self) -> type[EvaluationClass]:
         """
@@ -228,26 +626,53 @@ class BaseFunction(object):
         raise NotImplementedError("This function must be overwritten")
 
     def createEvaluationInstance(self, tup: Tuple[slice, int]) -> EvaluationClass:
-        return self.evaluationClass(self.U, self.p, tup)
+        return self.evaluationClass(self._U, self.p, tup)
 
     def __getitem__(self, tup: slice) -> EvaluationClass:
-        return self.createEvaluationInstance(tup)
+        evaluator = self.createEvaluationInstance(tup)
+        evaluator.cache = self.cache
+        return evaluator
 
-    def __call__(self, u: np.ndarray) -> np.ndarray:
-        return self[:, self.p] (u)
+    def __call__(self, u: np.ndarray, sparse: bool = False, workers: Optional[int] = None,
+                 executor: Optional[Executor] = None, chunksize: Optional[int] = None) -> Union[np.ndarray, SparseBasis]:
+        """
+        If workers or executor is given, u is split in chunks of chunksize values,
+        evaluated in parallel and written in the preallocated result, see chunk_map
+        """
+        evaluator = self[:, self.p]
+        if workers is None and executor is None:
+            return evaluator(u, sparse)
+        evaluator._validate_evaluation_u(u)
+        u = evaluator._treat_input(u)
+        function = partial(evaluator.__call__, sparse=sparse)
+        result = None
+        for index, L in chunk_map(function, u, workers, executor, chunksize):
+            if sparse:
+                if result is None:
+                    starts, values = np.zeros(len(u), dtype="int64"), np.zeros((len(u), L.width))
+                    result = SparseBasis(self.n, starts, values)
+                result.starts[index] = L.starts
+                result.values[index] = L.values
+            else:
+                if result is None:
+                    result = np.zeros((L.shape[0], len(u)))
+                result[:, index] = L
+        if result is None:
+            return evaluator(u, sparse)
+        return result
         
 
 class GeneralBaseFunction(BaseFunction):
 
     def __init__(self, U: Iterable[float]):
         super().__init__(U)
-        self.A = np.eye(self.n)
+        self.A = BandedMatrix.identity(self.n)
 
     def createEvaluationInstance(self, tup: Tuple[slice, int]) -> EvaluationClass:
-        return self.evaluationClass(self.U, self.p, tup, self.A)
+        return self.evaluationClass(self._U, self.p, tup, self.A)
 
     @property
-    def A(self) -> np.ndarray:
+    def A(self) -> BandedMatrix:
         return self._A
 
     @property
@@ -255,7 +680,9 @@ class GeneralBaseFunction(BaseFunction):
         return self._p
 
     @A.setter
-    def A(self, value: np.ndarray) -> None:
+    def A(self, value: Union[np.ndarray, BandedMatrix]) -> None:
+        if not isinstance(value, BandedMatrix):
+            value = BandedMatrix.fromarray(value)
         self._A = value
 
     @p.setter
@@ -265,18 +692,17 @@ class GeneralBaseFunction(BaseFunction):
         self._p = int(value)
 
     def derivate(self):
-        U = list(self.U)
-        newinstance = self.__class__(U)
+        newinstance = self.__class__(self._U)
         newinstance.p = self.p - 1
-        avals = np.zeros(self.n)
-        for i in range(self.n):
-            diff = self.U[i+self.p] - self.U[i]
-            if diff != 0:
-                avals[i] = self.p/diff
-        newA = np.diag(avals)
-        for i in range(self.n-1):
-            newA[i, i+1] = -avals[i+1]
-        newinstance.A = self.A @ newA
+        knots = self._U.array
+        diffs = knots[self.p:self.p+self.n] - knots[:self.n]
+        safe = np.where(diffs == 0, 1, diffs)
+        avals = np.where(diffs == 0, 0, self.p/safe)
+        data = np.zeros((self.n, 2))
+        data[:, 0] = avals
+        data[:-1, 1] = -avals[1:]
+        newinstance.A = self.A @ BandedMatrix(data, 0, 1)
+        newinstance.cache = self.cache
         return newinstance
 
 
@@ -309,27 +735,63 @@ class SplineBaseFunction(GeneralBaseFunction):
     def evaluationClass(self) -> type[EvaluationClass]:
         return SplineEvaluationClass
 
+    def elevate_degree(self, times: int = 1) -> "SplineBaseFunction":
+        """
+        Returns the basis of degree p+times whose space contains this one.
+        Each knot gets its multiplicity increased by times, so the
+        continuity at each knot is kept
+        """
+        if times < 0:
+            raise ValueError("Cannot elevate the degree by a negative number")
+        if self.p != self._U.p:
+            raise ValueError("The degree must be the degree of the knot vector")
+        V = np.repeat(self._U.knots, self._U.mults + times)
+        return self.__class__(VectorU.trusted(V))
+
+    def eval_derivs(self, u: np.ndarray, order: int = 1, sparse: bool = False) -> List[Union[np.ndarray, SparseBasis]]:
+        """
+        Returns [N(u), N'(u), ..., N^(order)(u)], computed in only one pass,
+        without the matrices A of derivate
+        """
+        evaluator = self[:, self.p]
+        evaluator._validate_evaluation_u(u)
+        result = evaluator.compute_derivatives(evaluator._treat_input(u), order)
+        if sparse:
+            return result
+        return [L.toarray() for L in result]
+
 class RationalBaseFunction(GeneralBaseFunction):
-    def __init__(self, U: Iterable[float]):
+    def __init__(self, U: Iterable[float], w: Optional[Iterable[float]] = None):
         super().__init__(U)
-        self.w = np.ones(self.n)
+        self.w = np.ones(self.n) if w is None else w
 
     @property
     def evaluationClass(self) -> type[EvaluationClass]:
         return RationalEvaluationClass
 
+    def createEvaluationInstance(self, tup: Tuple[slice, int]) -> EvaluationClass:
+        return self.evaluationClass(self._U, self.w, self.p, tup, self.A)
+
     @property
     def w(self):
         return self._w
 
     @w.setter
     def w(self, value: Iterable[float]):
-        for v in value:
-            v = float(v)
-            if v < 0:
-                raise ValueError("The weights must be positive")
+        value = np.array(value, dtype="float64")
+        if value.ndim != 1 or len(value) != self.n:
+            raise ValueError("The size of weights must be the same as number of functions")
+        if np.any(value < 0):
+            raise ValueError("The weights must be positive")
+        value.setflags(write=False)
         self._w = value
-    
+
+    def derivate(self):
+        """
+        The derivative of a rational function is not a change of A,
+        so it's not a base function. Use RationalCurve.derivate
+        """
+        raise TypeError("Rational base functions cannot be derivated, use RationalCurve(f, P).derivate()")
 
 
 class SplineEvaluationClass(EvaluationClass):
@@ -341,16 +803,67 @@ class SplineEvaluationClass(EvaluationClass):
     def f(self):
         return N
 
+    def compute_block(self, u: Union[float, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (spans, values) of N_spans: the only non-zero
+        values of each column of compute_matrix
+        """
+        if self.cache is None:
+            return N_spans(self.j, u, self._U)
+        key = BasisCache.key("block", self._U, self.j, 0, u)
+        return self.cache.get(key, lambda: N_spans(self.j, u, self._U))
+
+    def compute_derivatives_block(self, u: Union[float, np.ndarray], order: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (spans, ders) of N_spans_derivatives: ders[m, k] are the j+1
+        non-zero values of the k-th derivative, without the matrix A
+        """
+        if self.cache is None:
+            return N_spans_derivatives(self.j, order, u, self._U)
+        key = BasisCache.key("derivs", self._U, self.j, order, u)
+        return self.cache.get(key, lambda: N_spans_derivatives(self.j, order, u, self._U))
 
-class RationalEvaluationClass(EvaluationClass):
+    def compute_derivatives(self, u: Union[float, np.ndarray], order: int) -> List[SparseBasis]:
+        """
+        Returns the SparseBasis of the functions and of their derivatives
+        up to the given order, all computed in one pass by N_spans_derivatives
+        """
+        spans, ders = self.compute_derivatives_block(u, order)
+        return [self.block_to_sparse(spans, ders[:, k]) for k in range(order+1)]
+
+    def compute_matrix(self, u: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Instead of calling N for each function, scatters the block
+        of the j+1 non-zero functions of each u
+        """
+        spans, values = self.compute_block(u)
+        j = self.j
+        r = np.zeros((self.n, len(spans)))
+        rows = spans[:, None] - j + np.arange(j+1)
+        cols = np.arange(len(spans))[:, None]
+        r[rows, cols] = values
+        return r
+
+
+class RationalEvaluationClass(SplineEvaluationClass):
     def __init__(self, U: Iterable[float], w: Iterable[float], p: int, tup: Any, A: Optional[np.ndarray]=None):
         super().__init__(U, p, tup, A)
         self.w = w
         
     @property
     def f(self):
-        raise NotImplementedError("TO DO")
-        return R
+        return lambda i, j, k, u, U: R(i, j, k, u, U, self.w)
+
+    def compute_block(self, u: Union[float, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Weights the j+1 non-zero values of N_spans and normalizes them,
+        so the denominator uses only the functions of each interval
+        """
+        spans, values = super().compute_block(u)
+        j = self.j
+        values = values * self.w[spans[:, None] - j + np.arange(j+1)]
+        values /= np.sum(values, axis=1)[:, None]
+        return spans, values
 
     @property
     def w(self):
@@ -364,5 +877,3 @@ class RationalEvaluationClass(EvaluationClass):
         if len(value) != self.U.n:
             raise ValueError("The size of weights must be the same as number of functions")
         self._w = value
-
-    
\ No newline at end of file
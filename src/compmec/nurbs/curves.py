@@ -1,6 +1,29 @@
+from compmec.nurbs.spaceu import VectorU
 from compmec.nurbs.basefunctions import BaseFunction, SplineBaseFunction, RationalBaseFunction
+from compmec.nurbs import knotoperations
+from compmec.nurbs.parallel import chunk_map
 import numpy as np
-from typing import Iterable
+from math import comb
+from functools import partial
+from concurrent.futures import Executor
+from typing import Iterable, Optional, Union
+
+def readonly_array(value: np.ndarray) -> np.ndarray:
+    """
+    Returns value as a float64 array that cannot be changed in place.
+    An array that is already read-only, as well as all its bases, is kept,
+    so views of read-only stacks are not copied
+    """
+    if isinstance(value, np.ndarray) and value.dtype == np.float64:
+        base = value
+        while isinstance(base, np.ndarray) and not base.flags.writeable:
+            base = base.base
+        if base is None:
+            return value
+    value = np.array(value, dtype="float64")
+    value.setflags(write=False)
+    return value
+
 
 class BaseCurve(object):
     def __init__(self, f: BaseFunction, controlpoints: np.ndarray):
@@ -20,70 +43,527 @@ class SplineCurve(BaseCurve):
     def __init__(self, f: SplineBaseFunction, controlpoints: np.ndarray):
         super().__init__(f, controlpoints)
 
+    @property
+    def f(self) -> SplineBaseFunction:
+        return self._f
+
+    @property
+    def P(self) -> np.ndarray:
+        return self._P
+
+    @f.setter
+    def f(self, value: SplineBaseFunction):
+        self._f = value
+        self._derivative = None
+        self._power = None
+
+    @P.setter
+    def P(self, value: np.ndarray):
+        """
+        P is kept read-only, so it changes only by this setter,
+        which clears the cached derivative
+        """
+        self._P = readonly_array(value)
+        self._derivative = None
+        self._power = None
+
+    def derivate(self):
+        """
+        Returns the derivative as a spline curve of degree p-1, on the knot vector
+        without the first and the last knots, whose control points are
+            Q_i = p * (P_{i+1} - P_i) / (u_{i+p+1} - u_{i+1})
+        The derivative is kept, so the next calls and the higher orders are cached
+        """
+        if self._derivative is None:
+            self._derivative = self.__compute_derivative()
+        return self._derivative
+
+    def __compute_derivative(self):
+        U = self.f[:, self.f.p].U
+        p = self.f.p
+        if p == 0:
+            raise ValueError("Cannot derivate a curve of degree 0")
+        if p != U.p:
+            return super().derivate()
+        knots = U.array
+        P = np.array(self.f.A.T @ self.P, dtype="float64")
+        diffs = knots[p+1:U.n+p] - knots[1:U.n]
+        safe = np.where(diffs == 0, 1, diffs)
+        factors = np.where(diffs == 0, 0, p / safe)
+        factors = factors.reshape((-1, ) + (1, )*(P.ndim-1))
+        Q = factors * (P[1:] - P[:-1])
+        V = VectorU.trusted(knots[1:-1])
+        return self.__class__(SplineBaseFunction(V), Q)
+
+    def __spline_form(self):
+        """
+        Returns the knot vector and the control points Q = A.T @ P.
+        The knot operations need a curve with the same degree of its knot vector
+        """
+        U = self.f[:, self.f.p].U
+        if self.f.p != U.p:
+            raise ValueError("The degree of the curve must be the degree of its knot vector")
+        Q = np.array(self.f.A.T @ self.P, dtype="float64")
+        return U, Q
+
+    def insert_knot(self, u: float, times: int = 1) -> "SplineCurve":
+        """
+        Returns the same curve with the knot u inserted times times
+        """
+        return self.refine([u]*times)
+
+    def refine(self, X: Iterable[float]) -> "SplineCurve":
+        """
+        Returns the same curve with all the knots X inserted at once,
+        by the Oslo algorithm. The knots in X can be repeated
+        """
+        U, Q = self.__spline_form()
+        V, Q = knotoperations.insert_knots(U, Q, X)
+        return self.__class__(SplineBaseFunction(V), Q.reshape((V.n, ) + np.shape(self.P)[1:]))
+
+    def remove_knot(self, u: float, times: int = 1, tolerance: float = 1e-12) -> "SplineCurve":
+        """
+        Returns the curve with the knot u removed up to times times,
+        while the distance to this curve is at most tolerance.
+        It stops when u is no longer in the knot vector
+        """
+        U, Q = self.__spline_form()
+        total = 0
+        for i in range(times):
+            knots = U.array
+            multiplicity = np.searchsorted(knots, u, side="right") - np.searchsorted(knots, u, side="left")
+            if i > 0 and multiplicity == 0:
+                break
+            V, R, error = knotoperations.remove_knot(U, Q, u)
+            if total + error > tolerance:
+                break
+            U, Q, total = V, R, total + error
+        return self.__class__(SplineBaseFunction(U), Q.reshape((U.n, ) + np.shape(self.P)[1:]))
+
+    def simplify(self, tolerance: float = 1e-12) -> "SplineCurve":
+        """
+        Returns the curve with all the knots that can be removed,
+        while the distance to this curve is at most tolerance
+        """
+        U, Q = self.__spline_form()
+        U, Q, _ = knotoperations.remove_knots(U, Q, tolerance)
+        return self.__class__(SplineBaseFunction(U), Q.reshape((U.n, ) + np.shape(self.P)[1:]))
+
+    def reduce_degree(self, tolerance: float = 1e-12) -> "SplineCurve":
+        """
+        Returns the curve of degree p-1 with the same interior knots.
+        Raises ValueError if its distance to this curve can be bigger than tolerance
+        """
+        U, Q = self.__spline_form()
+        V, Q, error = knotoperations.reduce_degree(U, Q)
+        if error > tolerance:
+            raise ValueError(f"Cannot reduce the degree: the error {error} is bigger than {tolerance}")
+        return self.__class__(SplineBaseFunction(V), Q.reshape((V.n, ) + np.shape(self.P)[1:]))
+
+    def elevate_degree(self, times: int = 1) -> "SplineCurve":
+        """
+        Returns the same curve with degree p+times
+        """
+        U, Q = self.__spline_form()
+        V, Q = knotoperations.elevate_degree(U, Q, times)
+        return self.__class__(SplineBaseFunction(V), Q.reshape((V.n, ) + np.shape(self.P)[1:]))
+
+    def compile(self) -> None:
+        """
+        Computes the power basis form of the curve: in each interval
+        [t_s, t_{s+1}) of the distinct knots, the curve is the polynomial
+            C(u) = sum_r c_{s,r} * (u - t_s)^r,  with c_{s,r} = C^(r)(t_s) / r!
+        All the coefficients come from one call of derivatives.
+        They are kept until P or f changes, or the knot vector or A of f changes.
+        As P is read-only, it changes only when a new P is set
+        """
+        evaluator = self.f[:, self.f.p]
+        breaks = evaluator.U.knots
+        ders = self.derivatives(breaks[:-1], evaluator.j)
+        factorials = np.cumprod([1] + list(range(1, evaluator.j+1)))
+        coefs = ders / factorials.reshape((-1, ) + (1, )*(ders.ndim-1))
+        self._power = (evaluator.U, self.f.A, self._P, breaks, coefs)
+
+    def __power_form(self):
+        if self._power is not None:
+            U, A, P = self._power[:3]
+            if U is self.f[:, self.f.p].U and A is self.f.A and P is self._P:
+                return self._power[3:]
+        self.compile()
+        return self._power[3:]
+
+    def horner(self, u: Iterable[float]) -> np.ndarray:
+        """
+        Evaluates the power basis form given by compile:
+        finds the interval of each u and uses Horner's scheme,
+        so each point costs only p multiply-adds
+        """
+        breaks, coefs = self.__power_form()
+        u = np.array(u, dtype="float64", ndmin=1)
+        spans = np.clip(np.searchsorted(breaks, u, side="right") - 1, 0, len(breaks)-2)
+        t = (u - breaks[spans]).reshape((-1, ) + (1, )*(coefs.ndim-2))
+        result = coefs[-1, spans]
+        for r in range(len(coefs)-2, -1, -1):
+            result = result * t + coefs[r, spans]
+        return result
+
+    def __call__(self, u: Iterable[float], method: str = "basis", workers: Optional[int] = None,
+                 executor: Optional[Executor] = None, chunksize: Optional[int] = None) -> np.ndarray:
+        """
+        Uses only the p+1 non-zero functions of each u.
+        As L = A @ B, then L.T @ P = B.T @ (A.T @ P)
+        The method can be
+            "basis": computes the p+1 functions and multiplies by the points
+            "deboor": de Boor's algorithm directly on the p+1 points
+            "power": Horner's scheme on the power basis form, see compile
+        If workers or executor is given, u is split in chunks of chunksize values,
+        evaluated in parallel and written in the preallocated result, see chunk_map
+        """
+        evaluator = self.f[:, self.f.p]
+        evaluator._validate_evaluation_u(u)
+        if workers is not None or executor is not None:
+            if method == "power":
+                self.__power_form()
+            u = evaluator._treat_input(u)
+            result = np.zeros((len(u), ) + np.shape(self.P)[1:])
+            function = partial(self.__call__, method=method)
+            for index, values in chunk_map(function, u, workers, executor, chunksize):
+                result[index] = values
+            return result
+        if method == "power":
+            return self.horner(u)
+        Q = np.array(self.f.A.T @ self.P, dtype="float64")
+        if method == "deboor":
+            return self.__deboor(u, Q, evaluator.j)
+        if method != "basis":
+            raise ValueError(f"Method {method} is not valid")
+        spans, values = evaluator.compute_block(u)
+        j = evaluator.j
+        result = values[:, 0, None] * Q[spans-j].reshape(len(spans), -1)
+        for z in range(1, j+1):
+            result += values[:, z, None] * Q[spans-j+z].reshape(len(spans), -1)
+        return result.reshape((len(spans), ) + Q.shape[1:])
+
+    def derivatives(self, u: Iterable[float], order: int = 1) -> np.ndarray:
+        """
+        Returns [C(u), C'(u), ..., C^(order)(u)] as an array of shape (order+1, M, dim)
+        All the derivatives come from only one pass of N_spans_derivatives,
+        which goes through the cache of f, see compute_derivatives_block
+        """
+        evaluator = self.f[:, self.f.p]
+        evaluator._validate_evaluation_u(u)
+        u = evaluator._treat_input(u)
+        Q = np.array(self.f.A.T @ self.P, dtype="float64")
+        Q2 = Q.reshape(len(Q), -1)
+        j = evaluator.j
+        spans, ders = evaluator.compute_derivatives_block(u, order)
+        points = Q2[spans[:, None] - j + np.arange(j+1)]
+        result = np.einsum("mkr,mrd->kmd", ders, points)
+        return result.reshape((order+1, len(u)) + Q.shape[1:])
+
+    def __deboor(self, u: np.ndarray, Q: np.ndarray, j: int) -> np.ndarray:
+        """
+        Evaluates sum_i N_{i,j}(u) * Q_i by de Boor's algorithm, vectorized over u,
+        with Q = A.T @ P and u already validated by __call__.
+        Only the j+1 points of each interval are used, so the memory is O(M*j*dim)
+        """
+        U = self.f[:, j].U
+        knots = U.array
+        u = np.array(u, dtype="float64", ndmin=1)
+        spans = np.minimum(U.spot(u), U.n-1)
+        Q2 = Q.reshape(len(Q), -1)
+        d = Q2[spans[:, None] - j + np.arange(j+1)]
+        for r in range(1, j+1):
+            for z in range(j, r-1, -1):
+                left = knots[spans-j+z]
+                right = knots[spans+1+z-r]
+                alpha = ((u - left)/(right - left))[:, None]
+                d[:, z] = (1-alpha) * d[:, z-1] + alpha * d[:, z]
+        return d[:, j].reshape((len(u), ) + Q.shape[1:])
+
+
+class SplineCurveBatch(object):
+    """
+    Many curves with the same base function f, whose control points
+    are stacked in an array of shape (ncurves, n, ...).
+    The basis is computed only once for all the curves.
+    The stack is copied once, as a read-only array, when the batch is created,
+    unless it's already read-only through all its bases, see readonly_array.
+    Selecting curves doesn't copy it: an integer or a slice
+    gives a view, other selections keep the indexs of the curves
+    """
+    def __init__(self, f: SplineBaseFunction, controlpoints: np.ndarray, index: Optional[Iterable[int]] = None):
+        controlpoints = readonly_array(controlpoints)
+        if controlpoints.ndim < 2 or controlpoints.shape[1] != f.n:
+            raise ValueError(f"The control points must have shape (ncurves, {f.n}, ...), received {controlpoints.shape}")
+        self._f = f
+        self._stack = controlpoints
+        self._index = None if index is None else np.asarray(index, dtype="int64")
+
+    @classmethod
+    def fromcurves(cls, curves: Iterable[SplineCurve]) -> "SplineCurveBatch":
+        curves = list(curves)
+        f = curves[0].f
+        if any(curve.f is not f for curve in curves):
+            raise ValueError("All the curves must have the same base function")
+        return cls(f, np.stack([curve.P for curve in curves]))
+
+    @property
+    def f(self) -> SplineBaseFunction:
+        return self._f
+
+    @property
+    def P(self) -> np.ndarray:
+        return self._stack if self._index is None else self._stack[self._index]
+
+    def __len__(self) -> int:
+        return len(self._stack) if self._index is None else len(self._index)
+
+    def __getitem__(self, key) -> Union[SplineCurve, "SplineCurveBatch"]:
+        if isinstance(key, (int, np.integer)):
+            index = range(len(self))[key]
+            if self._index is not None:
+                index = self._index[index]
+            return SplineCurve(self.f, self._stack[index])
+        if self._index is None and isinstance(key, slice):
+            return self.__class__(self.f, self._stack[key])
+        index = np.arange(len(self))[key]
+        if self._index is not None:
+            index = self._index[index]
+        return self.__class__(self.f, self._stack, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __call__(self, u: Iterable[float]) -> np.ndarray:
+        """
+        Returns the values of all the curves, of shape (ncurves, len(u), ...)
+        The sparse basis L is computed once and applied to the points of all
+        the curves at once, as a matrix of shape (n, ncurves*dim)
+        """
+        L = self.f(u, sparse=True)
+        P = np.moveaxis(self.P, 1, 0)
+        result = L.tdot(P.reshape(P.shape[0], -1)).reshape((L.shape[1], ) + P.shape[1:])
+        return np.moveaxis(result, 1, 0)
+
 
 class RationalCurve(BaseCurve):
+    """
+    The curve is evaluated with the homogeneous control points Pw = (w*P, w)
+        Cw(u) = sum_i N_i(u) * Pw_i = (A(u), w(u))
+        C(u) = A(u) / w(u)
+    So there's only one spline evaluation and one division.
+    The derivatives come from the derivatives of A and w:
+        C^(k) = (A^(k) - sum_{i=1}^{k} binom(k, i) * w^(i) * C^(k-i)) / w
+    which are all computed in the same pass of SplineCurve.derivatives.
+    The curve itself uses only the p+1 non-zero functions, like SplineCurve.
+    Pw is kept, and built again only when P, f or the weights of f change
+    """
     def __init__(self, f: RationalBaseFunction, controlpoints: np.ndarray):
         super().__init__(f, controlpoints)
+        self._order = 0
+
+    @property
+    def f(self) -> RationalBaseFunction:
+        return self._f
+
+    @property
+    def P(self) -> np.ndarray:
+        return self._P
+
+    @f.setter
+    def f(self, value: RationalBaseFunction):
+        self._f = value
+        self._spline = SplineBaseFunction(value[:, value.p].U)
+        self._homogeneous = None
+
+    @P.setter
+    def P(self, value: np.ndarray):
+        self._P = readonly_array(value)
+        self._homogeneous = None
+
+    @property
+    def Pw(self) -> np.ndarray:
+        return self.homogeneous.P
+
+    @property
+    def homogeneous(self) -> SplineCurve:
+        """
+        The spline curve Cw(u) of the homogeneous points Pw = (w*P, w)
+        """
+        w = self.f.w
+        if self._homogeneous is None or self._homogeneous[0] is not w:
+            P = self.P.reshape(len(w), -1)
+            Pw = np.concatenate((w[:, None] * P, w[:, None]), axis=1)
+            self._homogeneous = (w, SplineCurve(self._spline, Pw))
+        return self._homogeneous[1]
+
+    def __call__(self, u: Iterable[float]) -> np.ndarray:
+        if self._order == 0:
+            Cw = self.homogeneous(u)
+            result = Cw[:, :-1] / Cw[:, -1:]
+            return result.reshape((len(result), ) + np.shape(self.P)[1:])
+        Cw = self.homogeneous.derivatives(u, self._order)
+        w = Cw[0, :, -1:]
+        C = [Cw[0, :, :-1] / w]
+        for k in range(1, self._order+1):
+            value = Cw[k, :, :-1]
+            for i in range(1, k+1):
+                value = value - comb(k, i) * Cw[i, :, -1:] * C[k-i]
+            C.append(value / w)
+        result = C[self._order]
+        return result.reshape((len(result), ) + np.shape(self.P)[1:])
+
+    def elevate_degree(self, times: int = 1) -> "RationalCurve":
+        """
+        Returns the same curve with degree p+times.
+        The degree of the homogeneous points Pw is elevated, which gives
+        the new weights and the new control points
+        """
+        if self._order != 0:
+            raise ValueError("Cannot elevate the degree of a derivative")
+        U = self.f[:, self.f.p].U
+        if self.f.p != U.p:
+            raise ValueError("The degree of the curve must be the degree of its knot vector")
+        V, Qw = knotoperations.elevate_degree(U, self.Pw, times)
+        w = Qw[:, -1]
+        P = Qw[:, :-1] / w[:, None]
+        return self.__class__(RationalBaseFunction(V, w), P.reshape((V.n, ) + np.shape(self.P)[1:]))
+
+    def derivate(self):
+        curve = self.__class__(self.f, self.P)
+        curve._order = self._order + 1
+        curve._homogeneous = self._homogeneous
+        return curve
 
 class BaseXYFunction(object):
-    def __init__(self, f: BaseFunction, xconpoints: Iterable[float], yconpoints: Iterable[float]):
+    def __init__(self, f: BaseFunction, xconpoints: Iterable[float], yconpoints: Iterable[float], tolerance: float = 1e-12):
         self.f = f
+        self.X = np.array(xconpoints)
         self.Y = np.array(yconpoints)
+        self.tolerance = tolerance
         
-        nsample = 129
-        self.usample = np.linspace(0, 1, nsample)
-        L = self.f(self.usample)
-        self.xsample = L.T @ np.array(xconpoints)
-        if self.xsample[0] < self.xsample[-1]: # Always increase
-            for i in range(nsample-1):
-                if not self.xsample[i] < self.xsample[i+1]:
-                    print("self.xsample[%d] = " % i, self.xsample[i])
-                    print("self.xsample[%d] = " % (i+1), self.xsample[i+1])
-                    print("self.usample[%d] = " % i, self.usample[i])
-                    print("self.usample[%d] = " % (i+1), self.usample[i+1])
-                    raise ValueError("1: The x values must be increasing or decreasing")
-        else: # Always decrease
-            for i in range(nsample-1):
-                if not self.xsample[i] > self.xsample[i+1]:
-                    print("self.xsample[%d] = " % i, self.xsample[i])
-                    print("self.xsample[%d] = " % (i+1), self.xsample[i+1])
-                    print("self.usample[%d] = " % i, self.usample[i])
-                    print("self.usample[%d] = " % (i+1), self.usample[i+1])
-                    raise ValueError("2: The x values must be increasing or decreasing")
+        self._usample = None
+        self._xsample = None
+        self.verify_monotone()
+
+    def verify_monotone(self):
+        """
+        If the control points X are strictly monotone, so is x(u),
+        because x'(u) is a spline whose control points are the differences of X.
+        Only if it's not the case, the function is verified on samples
+        """
+        dX = np.diff(self.X)
+        if np.all(dX > 0) or np.all(dX < 0):
+            return
+        xsample = self.xvalues(np.linspace(0, 1, 129))
+        dx = np.diff(xsample)
+        if not (np.all(dx > 0) or np.all(dx < 0)):
+            raise ValueError("The x values must be increasing or decreasing")
+
+    def __build_samples(self, maxlevel: int = 8, ratio: float = 1e-2):
+        """
+        Builds the table of samples, starting with the knots and dividing
+        only the intervals where x(u) is far from the straight line
+        """
+        usample = np.unique(np.array(self.f.U))
+        xsample = self.xvalues(usample)
+        for level in range(maxlevel):
+            umid = (usample[:-1] + usample[1:])/2
+            xmid = self.xvalues(umid)
+            deviation = np.abs(xmid - (xsample[:-1] + xsample[1:])/2)
+            refine = deviation > ratio * np.abs(xsample[1:] - xsample[:-1])
+            if not np.any(refine):
+                break
+            usample = np.concatenate((usample, umid[refine]))
+            xsample = np.concatenate((xsample, xmid[refine]))
+            order = np.argsort(usample)
+            usample, xsample = usample[order], xsample[order]
+        self._usample, self._xsample = usample, xsample
+
+    @property
+    def usample(self) -> np.ndarray:
+        if self._usample is None:
+            self.__build_samples()
+        return self._usample
+
+    @property
+    def xsample(self) -> np.ndarray:
+        if self._xsample is None:
+            self.__build_samples()
+        return self._xsample
+
+    @property
+    def tolerance(self) -> float:
+        return self._tolerance
+
+    @tolerance.setter
+    def tolerance(self, value: float):
+        value = float(value)
+        if value <= 0:
+            raise ValueError("The tolerance must be positive")
+        self._tolerance = value
+
+    def xvalues(self, u: Iterable[float]) -> np.ndarray:
+        return self.f(u, sparse=True).tdot(self.X)
 
     def find_indexs(self, x: Iterable[float]) -> np.ndarray:
-        ind = np.zeros(len(x), dtype="int32")
-        maxxsample = np.max(self.xsample)
-        for i, xi in enumerate(x):
-            value = np.where((xi < self.xsample[1:])*(self.xsample[:-1] <= xi))[0]
-            if len(value) != 0:
-                ind[i] = value[0]
-            elif xi == maxxsample:
-                ind[i] = np.where(xi == self.xsample)[0][0]
-        return ind
+        """
+        Returns the indexs i such that x is between xsample[i] and xsample[i+1]
+        Uses np.searchsorted, since xsample is monotone
+        """
+        x = np.array(x, dtype="float64")
+        xsample = self.xsample
+        xmin, xmax = np.min(xsample), np.max(xsample)
+        if np.any(x < xmin) or np.any(xmax < x):
+            raise ValueError(f"All values of x must be inside the interval [{xmin}, {xmax}]")
+        nsample = len(xsample)
+        if xsample[0] < xsample[-1]:
+            ind = np.searchsorted(xsample, x, side="right") - 1
+        else:
+            ind = nsample - 1 - np.searchsorted(xsample[::-1], x, side="left")
+        return np.clip(ind, 0, nsample-2)
 
     def inverse(self, x: Iterable[float]) -> np.ndarray:
-        u = np.zeros(len(x))
+        """
+        Finds u such that x(u) = x.
+        The samples give an interval [ua, ub] for each x, which is refined
+        by the Illinois method until |x(u) - x| <= tolerance * (xmax - xmin)
+        """
+        x = np.array(x, dtype="float64")
         ind = self.find_indexs(x)
-        for i, xi in enumerate(x):
-            if ind[i] == len(self.xsample)-1:
-                u[i] = self.usample[ind[i]]
-                continue
-            ua, ub = self.usample[ind[i]], self.usample[ind[i]+1]
-            xa, xb = self.xsample[ind[i]], self.xsample[ind[i]+1]
-            u[i] += ub*(xi - xa)/(xb - xa)
-            u[i] += ua*(xb - xi)/(xb - xa)
+        ua, ub = self.usample[ind], self.usample[ind+1]
+        fa, fb = self.xsample[ind] - x, self.xsample[ind+1] - x
+        u = (ua*fb - ub*fa)/(fb - fa)
+        side = np.zeros(len(x), dtype="int8")
+        tolerance = self.tolerance * np.abs(self.xsample[-1] - self.xsample[0])
+        active = np.arange(len(x))
+        for iteration in range(100):
+            fu = self.xvalues(u[active]) - x[active]
+            done = np.abs(fu) <= tolerance
+            active, fu = active[~done], fu[~done]
+            if len(active) == 0:
+                break
+            right = fu * fb[active] > 0
+            left = ~right
+            ir, il = active[right], active[left]
+            ub[ir], fb[ir] = u[ir], fu[right]
+            fa[ir[side[ir] == 1]] /= 2
+            ua[il], fa[il] = u[il], fu[left]
+            fb[il[side[il] == -1]] /= 2
+            side[ir], side[il] = 1, -1
+            u[active] = (ua[active]*fb[active] - ub[active]*fa[active])/(fb[active] - fa[active])
         return u
 
     def __call__(self, x: Iterable[float]) -> np.ndarray:
         u = self.inverse(x)
-        L = self.f(u)
-        return L.T @ self.Y
+        return self.f(u, sparse=True).tdot(self.Y)
     
 class SplineXYFunction(BaseXYFunction):
-    def __init__(self, f: SplineBaseFunction, xconpoints: Iterable[float], yconpoints: Iterable[float]):
-        super().__init__(f, xconpoints, yconpoints)
+    def __init__(self, f: SplineBaseFunction, xconpoints: Iterable[float], yconpoints: Iterable[float], tolerance: float = 1e-12):
+        super().__init__(f, xconpoints, yconpoints, tolerance)
 
 class RationalXYFunction(BaseXYFunction):
-    def __init__(self, f: RationalBaseFunction, xconpoints: Iterable[float], yconpoints: Iterable[float]):
-        super().__init__(f, xconpoints, yconpoints)
\ No newline at end of file
+    def __init__(self, f: RationalBaseFunction, xconpoints: Iterable[float], yconpoints: Iterable[float], tolerance: float = 1e-12):
+        super().__init__(f, xconpoints, yconpoints, tolerance)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import numpy as np
+import hashlib
+from typing import Iterable, Optional, Tuple
+from compmec.nurbs.spaceu import VectorU
+from compmec.nurbs.basefunctions import SplineBaseFunction, LRUCache
+from compmec.nurbs.solvers import banded_lu, banded_lu_solve, banded_cholesky, banded_cholesky_solve
+
+
+class SplineFitter(object):
+    """
+    Finds the control points X such that
+        N(u).T @ X = y     if len(u) == n  (interpolation)
+        N(u).T @ X ~ y     if len(u) > n   (least squares, with optional weights)
+    for many different y, with the same knot vector U and the same parameters u.
+    The basis matrix and its factorization are computed only once and kept in
+    a LRU cache shared by all instances, keyed by (U, u, weights)
+    So each new y costs only the back-substitution.
+    The memory of the cache is bounded by SplineFitter.cache.maxbytes
+    """
+
+    cache = LRUCache()
+
+    def __init__(self, U: Iterable[float], u: Iterable[float], weights: Optional[Iterable[float]] = None):
+        self._U = U if isinstance(U, VectorU) else VectorU(U)
+        self._u = np.array(u, dtype="float64")
+        if weights is not None:
+            weights = np.array(weights, dtype="float64")
+            if weights.shape != self._u.shape:
+                raise ValueError("The weights must have the same shape as u")
+        self._weights = weights
+        self._key = self.__compute_key()
+
+    @property
+    def U(self) -> VectorU:
+        return self._U
+
+    @property
+    def n(self) -> int:
+        return self._U.n
+
+    def __compute_key(self) -> Tuple:
+        digest = hashlib.sha1(self._U.array.tobytes())
+        digest.update(self._u.tobytes())
+        if self._weights is not None:
+            digest.update(self._weights.tobytes())
+        return (self._U.p, self._U.n, len(self._u), digest.hexdigest())
+
+    def __factorize(self) -> Tuple:
+        N = SplineBaseFunction(self._U)
+        L = N(self._u, sparse=True)
+        if len(self._u) == self.n and self._weights is None:
+            order = np.argsort(L.starts, kind="stable")
+            factors = banded_lu(L.starts[order], L.values[order])
+            return ("lu", order, factors)
+        if len(self._u) < self.n:
+            raise ValueError("The number of points must be at least n = %d" % self.n)
+        weights = np.ones(len(self._u)) if self._weights is None else self._weights
+        factor = banded_cholesky(L.banded_gram(weights))
+        return ("cholesky", L, weights, factor)
+
+    @property
+    def factorization(self) -> Tuple:
+        return SplineFitter.cache.get(self._key, self.__factorize)
+
+    def fit(self, y: Iterable[float]) -> np.ndarray:
+        """
+        y must have shape (len(u), ...). If y is a matrix of shape (len(u), k),
+        the k signals are fitted at once and X has shape (n, k)
+        """
+        y = np.array(y, dtype="float64")
+        if y.shape[0] != len(self._u):
+            raise ValueError("y must have the same length as u")
+        factorization = self.factorization
+        if factorization[0] == "lu":
+            order, factors = factorization[1:]
+            return banded_lu_solve(factors, y[order])
+        L, weights, factor = factorization[1:]
+        Wy = weights.reshape((-1, ) + (1, )*(y.ndim-1)) * y
+        return banded_cholesky_solve(factor, L.dot(Wy))
+
+    @staticmethod
+    def cache_clear() -> None:
+        SplineFitter.cache.clear()
+
+    @staticmethod
+    def cache_size() -> int:
+        return len(SplineFitter.cache)
@@ -1,7 +1,10 @@
 import numpy as np
 from numpy import iterable, linalg as la
-from typing import Iterable, Optional, Any
-from compmec.nurbs import SplineBaseFunction, SplineCurve, SplineXYFunction
+from typing import Iterable, Optional, Any, Union
+from compmec.nurbs import SplineBaseFunction, VectorU, SplineCurve, SplineXYFunction
+from compmec.nurbs.basefunctions import SparseBasis
+from compmec.nurbs.solvers import solve_rows
+from compmec.nurbs.fitting import SplineFitter
 
 def transform2U(u: Iterable[float], n: float, p: int, algorithm: int = 1):
     if p < 1:
@@ -13,7 +16,7 @@ def transform2U(u: Iterable[float], n: float, p: int, algorithm: int = 1):
     else:
         ValueError("Algorithm is nod valid!")
     U[n:] = 1
-    return U
+    return VectorU.trusted(U)
 
 
 
@@ -38,17 +41,12 @@ def curve_spline(p: int, u: Iterable[Iterable[float]], points: Iterable[Iterable
 
     Ls = []
     for ui, function in zip(u, functions):
-        Ls.append(function(ui))
+        Ls.append(function(ui, sparse=True))
 
-    dim = points[0].shape[1]
-    M = np.zeros((totalndofs, totalndofs))
-    B = np.zeros((totalndofs, dim))
-    summe = 0
-    for i, ndof in enumerate(ndofs):
-        M[summe:summe+ndof, :] = Ls[i].T
-        B[summe:summe+ndof, :] = points[i][:, :]
-        summe += ndof
-    controlpoints = np.linalg.solve(M, B)
+    starts = np.concatenate([L.starts for L in Ls])
+    values = np.concatenate([L.values for L in Ls])
+    B = np.concatenate(points)
+    controlpoints = solve_rows(starts, values, B)
     return SplineCurve(N, controlpoints)
 
 
@@ -57,11 +55,16 @@ def function_spline(x: Iterable[float], y: Iterable[float], p: int):
     n = len(ubar)
     U = transform2U(ubar, n, p)
     N = SplineBaseFunction(U)
-    L = N(ubar)
-    X = curve_control_points(L, x)
-    Y = curve_control_points(L, y)
-    return SplineXYFunction(N, X, Y)
+    fitter = SplineFitter(U, ubar)
+    XY = fitter.fit(np.transpose([x, y]))
+    return SplineXYFunction(N, XY[:, 0], XY[:, 1])
 
 
-def curve_control_points(L: np.ndarray, y: Iterable[float]):
+def curve_control_points(L: Union[np.ndarray, SparseBasis], y: Iterable[float]):
+    """
+    Solves L.T @ X = y.
+    If L is a SparseBasis, L.T is banded and it costs O(n*p^2)
+    """
+    if isinstance(L, SparseBasis):
+        return solve_rows(L.starts, L.values, y)
     return la.solve(L.T, y)
\ No newline at end of file
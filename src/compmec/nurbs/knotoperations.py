@@ -0,0 +1,211 @@
+import numpy as np
+from math import comb
+from typing import Iterable, Tuple
+from compmec.nurbs.spaceu import VectorU
+from compmec.nurbs.basefunctions import SparseBasis, SplineBaseFunction
+from compmec.nurbs.fitting import SplineFitter
+from compmec.nurbs.solvers import banded_cholesky, banded_cholesky_solve
+
+
+def verify_new_knots(U: VectorU, X: Iterable[float]) -> np.ndarray:
+    """
+    Returns the sorted knots X to be inserted in U.
+    They must be interior knots, and after the insertion the
+    multiplicity of each one cannot be bigger than p (or 1 if p = 0)
+    """
+    X = np.sort(np.array(X, dtype="float64", ndmin=1))
+    if X.ndim != 1:
+        raise ValueError("The knots to insert must be a vector")
+    if len(X) == 0:
+        return X
+    if np.any(X <= U.umin) or np.any(X >= U.umax):
+        raise ValueError(f"The knots to insert must be inside ({U.umin}, {U.umax})")
+    values, counts = np.unique(X, return_counts=True)
+    old = np.searchsorted(U.array, values, side="right") - np.searchsorted(U.array, values, side="left")
+    if np.any(old + counts > max(U.p, 1)):
+        raise ValueError(f"The multiplicity of each knot cannot be bigger than p = {U.p}")
+    return X
+
+
+def refinement_matrix(U: VectorU, X: Iterable[float]) -> Tuple[VectorU, SparseBasis]:
+    """
+    Oslo algorithm. Inserts all the knots X in U at once and returns
+    the new knot vector V and the matrix T, of shape (n, nbar),
+    such that the new control points are Q = T.T @ P.
+    Each new point i depends only on the p+1 old points mu-p, ..., mu,
+    where U[mu] <= V[i] < U[mu+1], and its weights are the product
+        R_1(V[i+1]) @ R_2(V[i+2]) @ ... @ R_p(V[i+p])
+    computed for all the new points together
+    """
+    X = verify_new_knots(U, X)
+    knots, p, n = U.array, U.p, U.n
+    newknots = np.sort(np.concatenate((knots, X)))
+    nbar = n + len(X)
+    index = np.arange(nbar)
+    mu = np.clip(np.searchsorted(knots, newknots[:nbar], side="right") - 1, p, n-1)
+    values = np.ones((nbar, 1))
+    for k in range(1, p+1):
+        x = newknots[index + k][:, None]
+        j = mu[:, None] - k + 1 + np.arange(k)
+        left, right = knots[j], knots[j+k]
+        alpha = (x - left) / (right - left)
+        newvalues = np.zeros((nbar, k+1))
+        newvalues[:, :k] += values * (1 - alpha)
+        newvalues[:, 1:] += values * alpha
+        values = newvalues
+    return VectorU.trusted(newknots), SparseBasis(n, mu-p, values)
+
+
+def insert_knots(U: VectorU, P: np.ndarray, X: Iterable[float]) -> Tuple[VectorU, np.ndarray]:
+    """
+    Returns the knot vector with all the knots X and the
+    control points of the same curve on this new knot vector
+    """
+    V, T = refinement_matrix(U, X)
+    return V, T.tdot(P)
+
+
+def remove_knot(U: VectorU, P: np.ndarray, u: float) -> Tuple[VectorU, np.ndarray, float]:
+    """
+    Removes one occurrence of the interior knot u and returns the new knot
+    vector V, the new control points Q and the error of the removal.
+    Inserting u in V gives back U and the points T.T @ Q, which differ from
+    P only in the p-s+2 points around u (s the multiplicity of u in V).
+    Q is the least squares solution of this small bidiagonal system and the
+    error is the biggest distance between T.T @ Q and P.
+    By the convex hull property it bounds the distance between the curves
+    """
+    knots, p = U.array, U.p
+    left = np.searchsorted(knots, u, side="left")
+    right = np.searchsorted(knots, u, side="right")
+    if left == right or u <= U.umin or u >= U.umax:
+        raise ValueError(f"The value u = {u} is not an interior knot")
+    P = np.array(P, dtype="float64")
+    P2 = P.reshape(len(P), -1)
+    s = right - left - 1
+    k = right - 2
+    V = np.delete(knots, right-1)
+    if s > p:  # The function N_{right-p-2} is zero, its point is dropped
+        Q = np.delete(P, right-p-2, axis=0)
+        return VectorU.trusted(V), Q, 0.0
+    first, last = k-p, k-s+1
+    i = np.arange(first+1, last)
+    alpha = (u - V[i]) / (V[i+p] - V[i])
+    T = np.zeros((last-first+1, last-first))
+    T[0, 0] = 1
+    T[-1, -1] = 1
+    T[i-first, i-first] = alpha
+    T[i-first, i-first-1] = 1 - alpha
+    local = np.linalg.lstsq(T, P2[first:last+1], rcond=None)[0]
+    error = np.max(np.linalg.norm(T @ local - P2[first:last+1], axis=1))
+    Q = np.concatenate((P2[:first], local, P2[last+1:]))
+    return VectorU.trusted(V), Q.reshape((len(Q), ) + P.shape[1:]), float(error)
+
+
+def remove_knots(U: VectorU, P: np.ndarray, tolerance: float) -> Tuple[VectorU, np.ndarray, float]:
+    """
+    Removes all the interior knots it can, while the sum of the errors
+    of the removals is at most tolerance. Returns (V, Q, error).
+    At each pass the knots are tried in the increasing order of their errors,
+    so the exact removals come first and do not spend the tolerance
+    """
+    total = 0
+    removed = True
+    while removed:
+        removed = False
+        candidates = U.knots[1:-1]
+        errors = [remove_knot(U, P, u)[2] for u in candidates]
+        for index in np.argsort(errors, kind="stable"):
+            V, Q, error = remove_knot(U, P, candidates[index])
+            if total + error > tolerance:
+                continue
+            U, P, total = V, Q, total + error
+            removed = True
+    return U, P, total
+
+
+def bezier_points(U: VectorU) -> np.ndarray:
+    """
+    Returns the (nsegments, p+1) indexs of the Bezier points of each interval,
+    in the control points of U with each interior knot inserted until
+    its multiplicity is at least p (at least 1 if p = 0)
+    """
+    mults = U.mults.copy()
+    mults[1:-1] = np.maximum(mults[1:-1], max(U.p, 1))
+    lasts = np.cumsum(mults)[:-1] - 1
+    return lasts[:, None] - U.p + np.arange(U.p+1)
+
+
+def bezier_segments(U: VectorU, P: np.ndarray) -> np.ndarray:
+    """
+    Inserts each interior knot until its multiplicity is p and returns
+    the Bezier control points of each interval, of shape (nsegments, p+1, ...)
+    """
+    X = np.repeat(U.knots[1:-1], np.maximum(max(U.p, 1) - U.mults[1:-1], 0))
+    V, Q = insert_knots(U, P, X)
+    return Q[bezier_points(U)]
+
+
+def elevate_bezier(B: np.ndarray, times: int = 1) -> np.ndarray:
+    """
+    Elevates the degree of the Bezier control points B, of shape
+    (nsegments, p+1, ...), to p+times. The new point i is
+        sum_j binom(p, j) * binom(times, i-j) / binom(p+times, i) * B_j
+    """
+    p = B.shape[1] - 1
+    E = np.zeros((p+times+1, p+1))
+    for i in range(p+times+1):
+        for j in range(max(0, i-times), min(p, i)+1):
+            E[i, j] = comb(p, j) * comb(times, i-j) / comb(p+times, i)
+    return np.einsum("ij,sj...->si...", E, B)
+
+
+def reduce_degree(U: VectorU, P: np.ndarray) -> Tuple[VectorU, np.ndarray, float]:
+    """
+    Returns the knot vector V of degree p-1 with the same interior knots,
+    the control points Q of the least squares fit of the curve on V, and
+    an upper bound of the distance between the two curves.
+    The bound is the biggest difference between the Bezier points of the
+    curve and the Bezier points of the fit, elevated to degree p.
+    """
+    p = U.p
+    if p == 0:
+        raise ValueError("Cannot reduce the degree of a curve of degree 0")
+    knots = U.knots
+    mults = np.clip(U.mults[1:-1], 1, max(p-1, 1))
+    V = np.concatenate(([knots[0]]*p, np.repeat(knots[1:-1], mults), [knots[-1]]*p))
+    V = VectorU.trusted(V)
+    nodes = (1 - np.cos(np.pi*(2*np.arange(p+1)+1)/(2*p+2)))/2
+    usample = (knots[:-1, None] + np.diff(knots)[:, None] * nodes).flatten()
+    values = SplineBaseFunction(U)(usample, sparse=True).tdot(P)
+    Q = SplineFitter(V, usample).fit(values)
+    difference = bezier_segments(U, P) - elevate_bezier(bezier_segments(V, Q))
+    difference = difference.reshape(difference.shape[:2] + (-1, ))
+    error = np.max(np.linalg.norm(difference, axis=2))
+    return V, Q, float(error)
+
+
+def elevate_degree(U: VectorU, P: np.ndarray, times: int = 1) -> Tuple[VectorU, np.ndarray]:
+    """
+    Returns the knot vector V of degree p+times, where each knot has its
+    multiplicity increased by times, and the control points of the same curve on V.
+    The curve is split in Bezier segments, which are elevated one by one.
+    The segments are the curve on V with the knots X inserted, so they are
+        T.T @ Q = B,  with T = refinement_matrix(V, X)
+    and Q is found by the normal equations T @ T.T @ Q = T @ B,
+    solved by the banded Cholesky factorization in O(n).
+    The knots with multiplicity bigger than p+1 are reduced to p+1 before,
+    since their extra functions are zero
+    """
+    extra = np.maximum(U.mults[1:-1] - U.p - 1, 0)
+    for u in np.repeat(U.knots[1:-1], extra):
+        U, P, _ = remove_knot(U, P, u)
+    V = SplineBaseFunction(U).elevate_degree(times)._U
+    B = elevate_bezier(bezier_segments(U, P), times)
+    X = np.repeat(V.knots[1:-1], np.maximum(max(V.p, 1) - V.mults[1:-1], 0))
+    _, T = refinement_matrix(V, X)
+    index = bezier_points(V)
+    points = np.zeros((T.shape[1], ) + B.shape[2:])
+    points[index] = B
+    factor = banded_cholesky(T.banded_gram())
+    return V, banded_cholesky_solve(factor, T.dot(points))
@@ -0,0 +1,38 @@
+import os
+import numpy as np
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+
+def chunk_slices(M: int, chunksize: int) -> list:
+    return [slice(a, min(a+chunksize, M)) for a in range(0, M, chunksize)]
+
+
+def chunk_map(function: Callable[[np.ndarray], Any], u: np.ndarray,
+              workers: Optional[int] = None, executor: Optional[Executor] = None,
+              chunksize: Optional[int] = None) -> Iterator[Tuple[slice, Any]]:
+    """
+    Splits u in chunks and yields (slice, function(u[slice])) in the order of u,
+    so the caller writes each result in its preallocated array.
+    The chunks are evaluated by the given executor (thread or process pool),
+    or by a pool of workers threads. Without both, they're evaluated here.
+    Each point is computed alone, so the result doesn't depend on the chunks
+    """
+    u = np.array(u, dtype="float64", ndmin=1)
+    M = len(u)
+    if workers is not None and workers < 1:
+        raise ValueError(f"The number of workers must be positive, received {workers}")
+    parallel = executor is not None or (workers is not None and workers > 1)
+    if chunksize is None:
+        nchunks = 4 * (workers or os.cpu_count() or 1) if parallel else 1
+        chunksize = -(-M // nchunks)
+    chunksize = max(int(chunksize), 1)
+    slices = chunk_slices(M, chunksize)
+    chunks = [u[s] for s in slices]
+    if not parallel:
+        yield from zip(slices, map(function, chunks))
+    elif executor is not None:
+        yield from zip(slices, executor.map(function, chunks))
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            yield from zip(slices, pool.map(function, chunks))
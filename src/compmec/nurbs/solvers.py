@@ -0,0 +1,335 @@
+import numpy as np
+from numpy import linalg as la
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+
+def _shift(row: np.ndarray, d: int) -> np.ndarray:
+    """
+    Returns new such that new[c] = row[c+d], filling with zeros
+    """
+    new = np.zeros(row.shape)
+    if d >= 0:
+        new[:len(row)-d] = row[d:]
+    else:
+        new[-d:] = row[:len(row)+d]
+    return new
+
+
+def sort_rows(starts: Iterable[int], values: np.ndarray, B: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sorts the rows of the system by the first non-zero column,
+    which is needed to make the matrix of a B-spline collocation banded
+    """
+    starts = np.array(starts, dtype="int64")
+    order = np.argsort(starts, kind="stable")
+    return starts[order], np.array(values)[order], np.array(B)[order]
+
+
+def bandwidths(starts: Iterable[int], width: int) -> Tuple[int, int]:
+    """
+    Returns (lower, upper) bandwidths of the square matrix whose row i
+    has non-zero values only in the columns starts[i], ..., starts[i]+width-1
+    """
+    starts = np.array(starts, dtype="int64")
+    diffs = starts - np.arange(len(starts))
+    lower = max(0, -int(np.min(diffs)))
+    upper = max(0, int(np.max(diffs)) + width - 1)
+    return lower, upper
+
+
+def banded_lu(starts: Iterable[int], values: np.ndarray) -> Tuple:
+    """
+    LU factorization with partial pivoting of a square banded matrix,
+    whose row i has values[i] in the columns starts[i], ..., starts[i]+width-1
+    The row i of the factor U is stored in W[i], with W[i, c] = U[i, i-lower+c]
+    Costs O(n*lower*(lower+upper)), instead of O(n^3) of the dense LU
+    Returns the tuple (lower, W, pivots, multipliers) used by banded_lu_solve
+    """
+    starts = np.array(starts, dtype="int64")
+    values = np.array(values, dtype="float64")
+    n, width = values.shape
+    lower, upper = bandwidths(starts, width)
+    size = 2*lower + upper + 1
+    W = np.zeros((n, size))
+    cols = starts[:, None] - (np.arange(n)[:, None] - lower) + np.arange(width)
+    W[np.arange(n)[:, None], cols] = values
+    pivots = np.arange(n)
+    multipliers = np.zeros((n, lower))
+    for k in range(n):
+        last = min(k+lower, n-1)
+        candidates = W[np.arange(k, last+1), lower - np.arange(last-k+1)]
+        r = k + int(np.argmax(np.abs(candidates)))
+        if candidates[r-k] == 0:
+            raise la.LinAlgError("Singular matrix")
+        if r != k:
+            rowk = _shift(W[k], r-k)
+            W[k] = _shift(W[r], k-r)
+            W[r] = rowk
+            pivots[k] = r
+        pivot = W[k, lower]
+        for d in range(1, last-k+1):
+            factor = W[k+d, lower-d] / pivot
+            multipliers[k, d-1] = factor
+            W[k+d, :size-d] -= factor * W[k, d:]
+    return lower, W, pivots, multipliers
+
+
+def banded_lu_solve(factors: Tuple, B: np.ndarray) -> np.ndarray:
+    """
+    Solves A x = B, using the factors given by banded_lu
+    B can be a vector or a matrix of shape (n, ...)
+    """
+    lower, W, pivots, multipliers = factors
+    B = np.array(B, dtype="float64")
+    n, size = W.shape
+    X = B.reshape(n, -1).copy()
+    for k in range(n):
+        r = pivots[k]
+        if r != k:
+            X[[k, r]] = X[[r, k]]
+        last = min(k+lower, n-1)
+        X[k+1:last+1] -= multipliers[k, :last-k, None] * X[k]
+    for k in range(n-1, -1, -1):
+        last = min(k-lower+size, n)
+        X[k] -= W[k, lower+1:lower+last-k] @ X[k+1:last]
+        X[k] /= W[k, lower]
+    return X.reshape(B.shape)
+
+
+def solve_rows(starts: Iterable[int], values: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """
+    Solves the square system A x = B, where the row i of A has
+    values[i] in the columns starts[i], ..., starts[i]+width-1
+    The rows are sorted and the system is solved as a banded matrix.
+    If the band is not narrow, it's solved as a dense matrix
+    """
+    starts, values, B = sort_rows(starts, values, B)
+    n, width = values.shape
+    lower, upper = bandwidths(starts, width)
+    if 2*lower + upper + 1 < n:
+        return banded_lu_solve(banded_lu(starts, values), B)
+    A = np.zeros((n, n))
+    A[np.arange(n)[:, None], starts[:, None] + np.arange(width)] = values
+    return la.solve(A, B)
+
+
+def banded_cholesky(Gb: np.ndarray) -> np.ndarray:
+    """
+    Cholesky factorization G = C @ C.T of a symmetric positive definite banded matrix,
+    given in the lower form Gb[d, i] = G[i+d, i], for d = 0, ..., b
+    Returns the factor in the form Cr[i, c] = C[i, i-b+c], so Cr[i, b] is the diagonal
+    Costs O(n*b^2), instead of O(n^3) of the dense factorization
+    """
+    Gb = np.array(Gb, dtype="float64")
+    b = Gb.shape[0] - 1
+    n = Gb.shape[1]
+    Cr = np.zeros((n, b+1))
+    for i in range(n):
+        for j in range(max(0, i-b), i+1):
+            d = i - j
+            # C[i, k] and C[j, k] for k in max(0, i-b), ..., j-1
+            first = max(0, i-b)
+            sumprod = Cr[i, first-i+b:j-i+b] @ Cr[j, first-j+b:b]
+            if d == 0:
+                value = Gb[0, i] - sumprod
+                if value <= 0:
+                    raise la.LinAlgError("Matrix is not positive definite")
+                Cr[i, b] = np.sqrt(value)
+            else:
+                Cr[i, b-d] = (Gb[d, j] - sumprod) / Cr[j, b]
+    return Cr
+
+
+def banded_cholesky_solve(Cr: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """
+    Solves G x = B, using the factor given by banded_cholesky
+    B can be a vector or a matrix of shape (n, ...), so all the
+    columns are solved with the same factorization
+    """
+    B = np.array(B, dtype="float64")
+    n, size = Cr.shape
+    b = size - 1
+    X = B.reshape(n, -1).copy()
+    for i in range(n):
+        first = max(0, i-b)
+        X[i] -= Cr[i, first-i+b:b] @ X[first:i]
+        X[i] /= Cr[i, b]
+    for i in range(n-1, -1, -1):
+        last = min(n, i+b+1)
+        X[i] -= Cr[np.arange(i+1, last), b-np.arange(1, last-i)] @ X[i+1:last]
+        X[i] /= Cr[i, b]
+    return X.reshape(B.shape)
+
+
+def lsqr(matvec: Callable[[np.ndarray], np.ndarray], rmatvec: Callable[[np.ndarray], np.ndarray], b: np.ndarray, tol: float = 1e-12, maxiter: Optional[int] = None) -> np.ndarray:
+    """
+    Solves min ||A x - b|| by the LSQR algorithm of Paige and Saunders,
+    which uses only the products matvec(x) = A @ x and rmatvec(y) = A.T @ y
+    and never forms A.T @ A, so it works for ill-conditioned matrices.
+    If b is a matrix, all the columns are solved at the same time.
+    It stops when each column satisfies one of the tests of Paige and Saunders
+        ||r|| <= tol * (||b|| + ||A|| * ||x||)
+        ||A.T @ r|| <= tol * ||A|| * ||r||
+    and raises LinAlgError if it does not converge in maxiter iterations.
+    The number of iterations grows with the condition number of A,
+    so the columns of A should have similar norms
+    """
+    b = np.array(b, dtype="float64")
+    b2 = b.reshape(b.shape[0], -1)
+    def normalize(vector):
+        norm = np.linalg.norm(vector, axis=0)
+        safe = np.where(norm == 0, 1, norm)
+        return vector / safe, norm
+    u, beta = normalize(b2)
+    v, alpha = normalize(rmatvec(u))
+    n = v.shape[0]
+    if maxiter is None:
+        maxiter = 4*n
+    w = v.copy()
+    x = np.zeros(v.shape)
+    phibar, rhobar = beta, alpha
+    normb, normA = beta, alpha
+    converged = alpha * beta == 0
+    for iteration in range(maxiter):
+        if np.all(converged):
+            break
+        u, beta = normalize(matvec(v) - alpha*u)
+        normA = np.sqrt(normA**2 + beta**2)
+        v, alpha = normalize(rmatvec(u) - beta*v)
+        normA = np.sqrt(normA**2 + alpha**2)
+        rho = np.sqrt(rhobar**2 + beta**2)
+        rho = np.where(rho == 0, 1, rho)
+        c, s = rhobar/rho, beta/rho
+        theta = s * alpha
+        rhobar = -c * alpha
+        phi = c * phibar
+        phibar = s * phibar
+        x += (phi/rho) * w
+        w = v - (theta/rho) * w
+        normx = np.linalg.norm(x, axis=0)
+        converged |= phibar <= tol * (normb + normA * normx)
+        converged |= phibar * alpha * np.abs(c) <= tol * normA * phibar
+    else:
+        if not np.all(converged):
+            raise la.LinAlgError(f"LSQR did not converge in {maxiter} iterations")
+    return x.reshape((n, ) + b.shape[1:])
+
+
+class BandedMatrix(object):
+    """
+    Square matrix A of size n, whose non-zero values are only in the band
+        i - lower <= k <= i + upper
+    It's stored by rows, with data[i, c] = A[i, i-lower+c]
+    So the memory is O(n*(lower+upper+1)) instead of O(n^2)
+    """
+
+    def __init__(self, data: np.ndarray, lower: int, upper: int):
+        data = np.array(data, dtype="float64")
+        if data.ndim != 2 or data.shape[1] != lower+upper+1:
+            raise ValueError("data must have shape (n, lower+upper+1)")
+        self._data = data
+        self._lower = int(lower)
+        self._upper = int(upper)
+
+    @classmethod
+    def identity(cls, n: int) -> "BandedMatrix":
+        return cls(np.ones((n, 1)), 0, 0)
+
+    @classmethod
+    def fromarray(cls, A: np.ndarray) -> "BandedMatrix":
+        A = np.array(A, dtype="float64")
+        if A.ndim != 2 or A.shape[0] != A.shape[1]:
+            raise ValueError("The given numpy array must be a square matrix")
+        rows, cols = np.nonzero(A)
+        lower = int(np.max(rows - cols, initial=0))
+        upper = int(np.max(cols - rows, initial=0))
+        instance = cls(np.zeros((len(A), lower+upper+1)), lower, upper)
+        instance._data[rows, cols - rows + lower] = A[rows, cols]
+        return instance
+
+    @property
+    def n(self) -> int:
+        return self._data.shape[0]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.n, self.n)
+
+    @property
+    def lower(self) -> int:
+        return self._lower
+
+    @property
+    def upper(self) -> int:
+        return self._upper
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data
+
+    @property
+    def isidentity(self) -> bool:
+        return self._lower == 0 and self._upper == 0 and np.all(self._data == 1)
+
+    def diagonal(self) -> np.ndarray:
+        return self._data[:, self._lower]
+
+    def entries(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """
+        Returns A[rows, cols], with zeros outside of the band
+        """
+        rows, cols = np.broadcast_arrays(rows, cols)
+        c = cols - rows + self._lower
+        inside = (0 <= c) & (c <= self._lower + self._upper) & (0 <= rows) & (rows < self.n)
+        result = np.zeros(rows.shape)
+        result[inside] = self._data[rows[inside], c[inside]]
+        return result
+
+    def toarray(self) -> np.ndarray:
+        n = self.n
+        rows = np.arange(n)[:, None] + np.zeros(self._data.shape[1], dtype="int64")
+        cols = rows - self._lower + np.arange(self._data.shape[1])
+        inside = (0 <= cols) & (cols < n)
+        result = np.zeros((n, n))
+        result[rows[inside], cols[inside]] = self._data[inside]
+        return result
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        result = self.toarray()
+        return result if dtype is None else result.astype(dtype)
+
+    @property
+    def T(self) -> "BandedMatrix":
+        n, size = self._data.shape
+        rows = np.arange(n)[:, None] - self._upper + np.arange(size)
+        cols = np.arange(n)[:, None] + np.zeros(size, dtype="int64")
+        data = self.entries(rows, cols)
+        return self.__class__(data, self._upper, self._lower)
+
+    def __matmul__(self, other: Union["BandedMatrix", np.ndarray]) -> Union["BandedMatrix", np.ndarray]:
+        if isinstance(other, BandedMatrix):
+            return self.__matmul_banded(other)
+        other = np.array(other, dtype="float64")
+        if self.isidentity:
+            return other
+        n = self.n
+        X = other.reshape(n, -1)
+        result = np.zeros(X.shape)
+        for c in range(self._data.shape[1]):
+            d = c - self._lower
+            first, last = max(0, -d), min(n, n-d)
+            result[first:last] += self._data[first:last, c, None] * X[first+d:last+d]
+        return result.reshape(other.shape)
+
+    def __matmul_banded(self, other: "BandedMatrix") -> "BandedMatrix":
+        n = self.n
+        lower = self._lower + other._lower
+        upper = self._upper + other._upper
+        data = np.zeros((n, lower+upper+1))
+        rows = np.arange(n)
+        for a in range(self._data.shape[1]):
+            middle = rows - self._lower + a
+            inside = (0 <= middle) & (middle < n)
+            for b in range(other._data.shape[1]):
+                data[inside, a+b] += self._data[inside, a] * other._data[middle[inside], b]
+        return self.__class__(data, lower, upper)
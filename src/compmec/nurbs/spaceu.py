@@ -2,6 +2,10 @@ import numpy as np
 from typing import Iterable, Union
 
 class VerifyVectorU(object):
+    """
+    Each verification receives U already converted to a float numpy array
+    by toarray, so all of them are vectorized
+    """
 
     __minU = 0
     __maxU = 1
@@ -12,21 +16,28 @@ class VerifyVectorU(object):
             iter(U)
         except TypeError as e:
             raise TypeError(f"The given U ({type(U)}) is not iterable")
+
+    @staticmethod
+    def toarray(U: Iterable[float]) -> np.ndarray:
+        VerifyVectorU.isIterable(U)
+        if not isinstance(U, np.ndarray):
+            U = list(U)
+        try:
+            array = np.array(U, dtype="float64")
+        except (TypeError, ValueError) as e:
+            raise TypeError(f"Each element inside U must be a float: {e}")
+        if array.ndim != 1:
+            raise TypeError("Each element inside U must be a float, U must be a vector")
+        return array
         
     @staticmethod
     def eachElementIsFloat(U: Iterable[float]) -> None:
-        try:
-            for u in U:
-                float(u)
-        except Exception as e:
-            raise TypeError(f"Each element inside U must be a float, cannot transform {type(u)} on float")
+        VerifyVectorU.toarray(U)
         
     @staticmethod
     def isOrdenedVector(U: Iterable[float]) -> None:
-        n = len(U)
-        for i in range(n-1):
-            if U[i] > U[i+1]:
-                raise ValueError("The given U must be ordened")
+        if np.any(np.diff(U) < 0):
+            raise ValueError("The given U must be ordened")
             
     @staticmethod
     def Limits(U: Iterable[float]) -> None:
@@ -37,15 +48,13 @@ class VerifyVectorU(object):
 
     @staticmethod
     def InferiorLimit(U: Iterable[float]) -> None:
-        for u in U:
-            if u < VerifyVectorU.__minU:
-                raise ValueError(f"All the values in U must be bigger than {VerifyVectorU.__minU}")
+        if np.any(np.array(U) < VerifyVectorU.__minU):
+            raise ValueError(f"All the values in U must be bigger than {VerifyVectorU.__minU}")
 
     @staticmethod
     def SuperiorLimit(U: Iterable[float]) -> None:
-        for u in U:
-            if u > VerifyVectorU.__maxU:
-                raise ValueError(f"All the values in U must be less than {VerifyVectorU.__maxU}")
+        if np.any(np.array(U) > VerifyVectorU.__maxU):
+            raise ValueError(f"All the values in U must be less than {VerifyVectorU.__maxU}")
         
     @staticmethod
     def SameQuantityBoundary(U: Iterable[float]) -> None:
@@ -56,11 +65,15 @@ class VerifyVectorU(object):
             raise ValueError("U must contain the same quantity of 0 and 1")
 
     @staticmethod
-    def all(U: Iterable[float]) -> None:
-        VerifyVectorU.isIterable(U)
-        VerifyVectorU.eachElementIsFloat(U)
-        VerifyVectorU.Limits(U)
-        VerifyVectorU.SameQuantityBoundary(U)
+    def all(U: Iterable[float]) -> np.ndarray:
+        """
+        Converts U only once and verifies it, returning the float array
+        """
+        array = VerifyVectorU.toarray(U)
+        VerifyVectorU.isOrdenedVector(array)
+        VerifyVectorU.Limits(array)
+        VerifyVectorU.SameQuantityBoundary(array)
+        return array
 
 def getU_uniform(n, p):
     if n < p:
@@ -86,23 +99,75 @@ def getU_random(n, p):
     U = np.concatenate((U, np.ones(p+1)))
     return VectorU(U)
 
-class VectorU(tuple):
+class VectorU(object):
+    """
+    Knot vector U = [0, ..., 0, ?, ..., ?, 1, ..., 1]
+    The values are stored in a read-only float64 numpy array, and
+    the structure of U is computed only once, at the creation:
+        knots: the unique values of U
+        mults: the multiplicity of each unique value
+        spans: the indexs k such that [U[k], U[k+1]] is not empty
+    """
 
-    def __new__(cls, U: Iterable[float]):
-        VerifyVectorU.all(U)
-        return super().__new__(cls, U)
+    __slots__ = ("_array", "_knots", "_mults", "_spans", "_p", "_n")
 
-    def __init__(self, U: Iterable[float]):
+    def __init__(self, U: Iterable[float], validate: bool = True):
+        """
+        If validate is False, U is not verified.
+        It must be used only for knot vectors that are known to be valid
+        """
+        if validate:
+            U = VerifyVectorU.all(U)
+        self.__set_array(U)
+
+    @classmethod
+    def trusted(cls, U: Iterable[float]) -> "VectorU":
+        """
+        Creates a VectorU without verifying U.
+        Must be used only for knot vectors made internally, that are already valid
+        """
+        return cls(U, validate=False)
+
+    def __set_array(self, U: Iterable[float]):
+        array = np.array(U, dtype="float64")
+        array.flags.writeable = False
+        self._array = array
+        self._knots, self._mults = np.unique(array, return_counts=True)
+        self._spans = np.nonzero(array[:-1] < array[1:])[0]
         self.compute_np()
-        
+
     @property
-    def p(self):
+    def p(self) -> int:
         return self._p
     
     @property
-    def n(self):
+    def n(self) -> int:
         return self._n
 
+    @property
+    def array(self) -> np.ndarray:
+        return self._array
+
+    @property
+    def knots(self) -> np.ndarray:
+        return self._knots
+
+    @property
+    def mults(self) -> np.ndarray:
+        return self._mults
+
+    @property
+    def spans(self) -> np.ndarray:
+        return self._spans
+
+    @property
+    def umin(self) -> float:
+        return float(self._knots[0])
+
+    @property
+    def umax(self) -> float:
+        return float(self._knots[-1])
+
     def compute_np(self):
         """
         We have that U = [0, ..., 0, ?, ..., ?, 1, ..., 1]
@@ -113,47 +178,46 @@ class VectorU(tuple):
             len(U) = m + 1 = n + p + 1
         That means that 
             m = n + p
+        The multiplicity of 0 is p+1
         """
-        minU = min(self)
-        m = len(self) - 1
-        for i in range(m):
-            if self[i] != minU:
-                break
-        self._p = i-1
-        self._n = m - self.p
-
-    def __find_spot_onevalue(self, u: float) -> int:
-        U = np.array(self)
-        minU = np.min(self)
-        maxU = np.max(self)
-        lower = int(np.max(np.where(U == minU)))
-        upper = int(np.min(np.where(U == maxU)))
-        if u == minU:
-            return lower
-        if u == maxU:
-            return upper
-        mid = (lower + upper) // 2
-        while True:
-            if u < U[mid]:
-                upper = mid
-            elif U[mid + 1] <= u:
-                lower = mid
-            else:
-                return mid
-            mid = (lower + upper) // 2
-
-    def __find_spot_vector(self, u: Iterable[float]) -> np.ndarray:
-        """
-        find the spots of an vector. It's not very efficient, but ok for the moment
-        """
-        spots = np.zeros(len(u), dtype="int64")
-        for i, ui in enumerate(u):
-            spots[i] = self.__find_spot_onevalue(ui)
-        return spots
+        self._p = int(self._mults[0]) - 1
+        self._n = len(self._array) - self._p - 1
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[float, np.ndarray]:
+        if isinstance(index, slice):
+            return self._array[index]
+        return float(self._array[index])
+
+    def __iter__(self):
+        return iter(self._array.tolist())
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if dtype is None:
+            return self._array
+        return self._array.astype(dtype)
 
-    def spot(self, u: Union[float, Iterable[float]]) -> Union[int, np.ndarray]:
-        if isinstance(u, np.ndarray):
-            return self.__find_spot_vector(u)
-        else:
-            return np.array(self.__find_spot_onevalue(u))
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, VectorU):
+            return NotImplemented
+        return np.array_equal(self._array, other._array)
 
+    def __hash__(self) -> int:
+        return hash(self._array.tobytes())
+
+    def __repr__(self) -> str:
+        return "VectorU(%s)" % self._array.tolist()
+
+    def spot(self, u: Union[float, Iterable[float]]) -> np.ndarray:
+        """
+        Returns the index k such that U[k] <= u < U[k+1], using np.searchsorted
+        on the cached array of knots, so it costs O(log n) for each value.
+        The interval is closed at the right: if u = max(U), returns n
+        Returns an int array with the same shape of u
+        """
+        u = np.asarray(u, dtype="float64")
+        spots = np.searchsorted(self._array, u, side="right") - 1
+        spots = np.clip(spots, self.p, self.n)
+        return np.where(u < self.umax, spots, self.n)
@@ -0,0 +1,108 @@
+import numpy as np
+from typing import Iterable, Optional
+from compmec.nurbs.basefunctions import SplineBaseFunction, SparseBasis
+
+
+class BaseSurface(object):
+    def __init__(self, fu: SplineBaseFunction, fv: SplineBaseFunction, controlpoints: np.ndarray):
+        self.fu = fu
+        self.fv = fv
+        self.P = controlpoints
+
+    @property
+    def P(self) -> np.ndarray:
+        return self._P
+
+    @P.setter
+    def P(self, value: np.ndarray):
+        value = np.array(value, dtype="float64")
+        if value.shape[:2] != (self.fu.n, self.fv.n):
+            raise ValueError(f"The control net must have shape ({self.fu.n}, {self.fv.n}, ...), received {value.shape}")
+        self._P = value
+
+
+class SplineSurface(BaseSurface):
+    """
+    Tensor product surface
+        S(u, v) = sum_a sum_b Nu_a(u) * Nv_b(v) * P_ab
+    The control net P has shape (nu, nv, ...)
+    """
+    def __init__(self, fu: SplineBaseFunction, fv: SplineBaseFunction, controlpoints: np.ndarray):
+        super().__init__(fu, fv, controlpoints)
+
+    def __call__(self, u: Iterable[float], v: Iterable[float], grid: bool = True) -> np.ndarray:
+        """
+        If grid, returns S(u_i, v_j) of shape (len(u), len(v), ...)
+        Else, u and v have the same length and returns S(u_k, v_k) of shape (len(u), ...)
+        The sparse bases of u and v are computed only once
+        """
+        return self._evaluate(u, v, grid, self.P)
+
+    def _evaluate(self, u: Iterable[float], v: Iterable[float], grid: bool, P: np.ndarray) -> np.ndarray:
+        """
+        Contracts the bases of u and v with the net P, which may not be self.P
+        """
+        Lu = self.fu(u, sparse=True)
+        Lv = self.fv(v, sparse=True)
+        if grid:
+            return self._evaluate_grid(Lu, Lv, P)
+        return self._evaluate_points(Lu, Lv, P)
+
+    def _evaluate_grid(self, Lu: SparseBasis, Lv: SparseBasis, P: np.ndarray) -> np.ndarray:
+        """
+        First contracts u, T = Lu.T @ P of shape (Mu, nv, ...), costing O(Mu*(p+1)*nv),
+        then contracts v, costing O(Mu*Mv*(q+1))
+        """
+        nu, nv = P.shape[:2]
+        Mu, Mv = Lu.shape[1], Lv.shape[1]
+        T = Lu.tdot(P.reshape(nu, -1)).reshape(Mu, nv, -1)
+        T = np.moveaxis(T, 1, 0).reshape(nv, -1)
+        S = Lv.tdot(T).reshape(Mv, Mu, -1)
+        return np.moveaxis(S, 1, 0).reshape((Mu, Mv) + P.shape[2:])
+
+    def _evaluate_points(self, Lu: SparseBasis, Lv: SparseBasis, P: np.ndarray) -> np.ndarray:
+        """
+        Each point uses only the (p+1)*(q+1) points of the net around it
+        """
+        M = Lu.shape[1]
+        if Lv.shape[1] != M:
+            raise ValueError("u and v must have the same length when grid = False")
+        P2 = P.reshape(P.shape[:2] + (-1, ))
+        points = P2[Lu.rows()[:, :, None], Lv.rows()[:, None, :]]
+        S = np.einsum("ma,mb,mabd->md", Lu.values, Lv.values, points)
+        return S.reshape((M, ) + P.shape[2:])
+
+
+class RationalSurface(SplineSurface):
+    """
+    The surface is evaluated with the homogeneous net Pw = (w*P, w)
+        S(u, v) = sum_ab Nu_a * Nv_b * w_ab * P_ab / sum_ab Nu_a * Nv_b * w_ab
+    The weights w have shape (nu, nv)
+    """
+    def __init__(self, fu: SplineBaseFunction, fv: SplineBaseFunction, controlpoints: np.ndarray, weights: Optional[Iterable[float]] = None):
+        super().__init__(fu, fv, controlpoints)
+        self.w = np.ones((fu.n, fv.n)) if weights is None else weights
+
+    @property
+    def w(self) -> np.ndarray:
+        return self._w
+
+    @w.setter
+    def w(self, value: Iterable[float]):
+        value = np.array(value, dtype="float64")
+        if value.shape != (self.fu.n, self.fv.n):
+            raise ValueError(f"The weights must have shape ({self.fu.n}, {self.fv.n})")
+        if np.any(value < 0):
+            raise ValueError("The weights must be positive")
+        self._w = value
+
+    @property
+    def Pw(self) -> np.ndarray:
+        nu, nv = self.w.shape
+        P = self.P.reshape(nu, nv, -1)
+        return np.concatenate((self.w[:, :, None] * P, self.w[:, :, None]), axis=2)
+
+    def __call__(self, u: Iterable[float], v: Iterable[float], grid: bool = True) -> np.ndarray:
+        Sw = self._evaluate(u, v, grid, self.Pw)
+        S = Sw[..., :-1] / Sw[..., -1:]
+        return S.reshape(S.shape[:-1] + self.P.shape[2:])
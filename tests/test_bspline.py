@@ -1,5 +1,6 @@
 import pytest
-from compmec.nurbs import SplineBaseFunction
+from compmec.nurbs import SplineBaseFunction, SplineCurve
+from compmec.nurbs.basefunctions import N, N_span, N_spans, BasisCache
 from compmec.nurbs.spaceu import getU_uniform, getU_random
 import numpy as np
 
@@ -259,6 +260,117 @@ def test_tableUrandom():
             for k in range(len(u)):
                 np.testing.assert_almost_equal(np.sum(M[:, k]), 1)
 
+def test_spanvalues_equal_recursive():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 7)
+        n = np.random.randint(p+1, p+11)
+        U = getU_random(n, p)
+        u = np.random.rand(11)
+        for j in range(p+1):
+            for uk in u:
+                k = min(int(U.spot(uk)), U.n-1)
+                good = [N(z, j, k, uk, U) for z in range(k-j, k+1)]
+                test = N_span(k, j, uk, U)
+                np.testing.assert_allclose(test, good, atol=1e-12)
+
+def test_spansvalues_vectorized():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 7)
+        n = np.random.randint(p+1, p+11)
+        U = getU_random(n, p)
+        u = np.concatenate(([0, 1], np.random.rand(31)))
+        for j in range(p+1):
+            spans, values = N_spans(j, u, U)
+            for m, um in enumerate(u):
+                np.testing.assert_allclose(values[m], N_span(spans[m], j, um, U))
+
+def test_sparse_equal_dense():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 6)
+        n = np.random.randint(p+1, p+11)
+        U = getU_random(n, p)
+        u = np.concatenate(([0, 1], np.random.rand(11)))
+        N = SplineBaseFunction(U)
+        n = N.n
+        L = N(u, sparse=True)
+        assert L.shape == (n, len(u))
+        assert L.width == p+1
+        np.testing.assert_allclose(L.toarray(), N(u))
+        y = np.random.rand(len(u), 2)
+        np.testing.assert_allclose(L.dot(y), N(u) @ y)
+        y = np.random.rand(len(u), 3, 7)
+        np.testing.assert_allclose(L.dot(y), np.einsum("im,mab->iab", N(u), y))
+        gram = N(u) @ N(u).T
+        banded = L.banded_gram()
+        for d in range(L.width):
+            np.testing.assert_allclose(banded[d, :n-d], np.diagonal(gram, -d), atol=1e-12)
+        P = np.random.rand(n, 3)
+        np.testing.assert_allclose(L.tdot(P), N(u).T @ P)
+        for j in range(p+1):
+            dense = np.zeros((n, len(u)))
+            dense[1:n-1] = N[1:n-1, j](u)
+            np.testing.assert_allclose(N[1:n-1, j](u, sparse=True).toarray(), dense)
+
+def test_selectedrows():
+    U = getU_random(9, 3)
+    N = SplineBaseFunction(U)
+    assert N.A.isidentity
+    u = np.concatenate(([0, 1], np.random.rand(11)))
+    M = N(u)
+    for j in range(4):
+        Mj = N[:, j](u)
+        for i in range(N.n):
+            np.testing.assert_allclose(N[i, j](u), Mj[i:i+1])
+        np.testing.assert_allclose(N[::2, j](u), Mj[::2])
+        np.testing.assert_allclose(N[5:1:-2, j](u), Mj[5:1:-2])
+
+
+def test_basiscache():
+    N = SplineBaseFunction(getU_random(7, 3))
+    u = np.random.rand(41)
+    good = N(u)
+    N.cache = BasisCache()
+    np.testing.assert_allclose(N(u), good)
+    np.testing.assert_allclose(N(u), good)
+    assert N.cache.info()["hits"] == 1
+    assert N.cache.misses == 1
+    dN = N.derivate()
+    assert dN.cache is N.cache
+    np.testing.assert_allclose(dN(u), SplineBaseFunction(N.U).derivate()(u))
+    derivs = N.eval_derivs(u, 2)
+    np.testing.assert_allclose(N.eval_derivs(u, 2)[2], derivs[2])
+    assert N.cache.misses == 3
+    assert N.cache.hits == 2
+    N.cache.maxbytes = N.cache.nbytes // 2
+    N(np.random.rand(5))
+    assert N.cache.nbytes <= N.cache.maxbytes
+    assert len(N.cache) == 1
+    N.cache.clear()
+    assert len(N.cache) == 0
+    with pytest.raises(TypeError):
+        N.cache = {}
+
+def test_basiscachemixed():
+    N = SplineBaseFunction(getU_random(7, 3))
+    P = np.random.rand(N.n, 2)
+    u = np.random.rand(41)
+    good = N(u)
+    for first in range(2):
+        N.cache = BasisCache()
+        if first:
+            N.eval_derivs(u, 0)
+        np.testing.assert_allclose(N(u), good)
+        np.testing.assert_allclose(N.eval_derivs(u, 0)[0], good)
+        np.testing.assert_allclose(SplineCurve(N, P)(u), good.T @ P)
+        assert N.cache.misses == 2
+    derivs = N.eval_derivs(u, 2)
+    values = SplineCurve(N, P).derivatives(u, 2)
+    assert N.cache.misses == 3
+    for k in range(3):
+        np.testing.assert_allclose(values[k], derivs[k].T @ P)
 
 def main():
     test_getEvaluationFunctions_p1n2()
@@ -273,6 +385,12 @@ def main():
     test_tablevalues_p3n5()
     test_tableUuniform()
     test_tableUrandom()
+    test_spanvalues_equal_recursive()
+    test_spansvalues_vectorized()
+    test_sparse_equal_dense()
+    test_selectedrows()
+    test_basiscache()
+    test_basiscachemixed()
 
 if __name__ == "__main__":
     main()
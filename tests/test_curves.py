@@ -0,0 +1,283 @@
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from compmec.nurbs import SplineBaseFunction, SplineCurve, SplineCurveBatch
+from compmec.nurbs.spaceu import getU_random
+
+
+def test_deboor():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 6)
+        n = np.random.randint(p+1, p+11)
+        N = SplineBaseFunction(getU_random(n, p))
+        P = np.random.rand(N.n, 3)
+        C = SplineCurve(N, P)
+        u = np.concatenate(([0, 1], np.random.rand(31)))
+        good = N(u).T @ P
+        np.testing.assert_allclose(C(u, method="deboor"), good)
+        np.testing.assert_allclose(C(u, method="basis"), good)
+        if p > 0:
+            dC = C.derivate()
+            np.testing.assert_allclose(dC(u, method="deboor"), dC(u))
+
+def test_deboor1D():
+    N = SplineBaseFunction([0, 0, 0, 0.5, 1, 1, 1])
+    P = np.array([1, 3, 2, 4])
+    C = SplineCurve(N, P)
+    u = np.linspace(0, 1, 11)
+    assert C(u, method="deboor").shape == (11, )
+    np.testing.assert_allclose(C(u, method="deboor"), N(u).T @ P)
+    with pytest.raises(ValueError):
+        C(u, method="unknown")
+    with pytest.raises(Exception):
+        C([0.5, 1.5], method="deboor")
+
+def test_derivatives():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(1, 6)
+        n = np.random.randint(p+1, p+11)
+        N = SplineBaseFunction(getU_random(n, p))
+        P = np.random.rand(N.n, 3)
+        C = SplineCurve(N, P)
+        u = np.concatenate(([0, 1], np.random.rand(31)))
+        ders = C.derivatives(u, 3)
+        assert ders.shape == (4, len(u), 3)
+        curve = C
+        for k in range(min(p, 3)+1):
+            np.testing.assert_allclose(ders[k], curve(u), atol=1e-6)
+            curve = curve.derivate() if k < p else curve
+
+def test_derivatecurve():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(1, 6)
+        n = np.random.randint(p+1, p+11)
+        N = SplineBaseFunction(getU_random(n, p))
+        P = np.random.rand(N.n, 2)
+        C = SplineCurve(N, P)
+        dC = C.derivate()
+        assert dC.f.p == p-1
+        assert dC.f.n == N.n-1
+        np.testing.assert_allclose(dC.f.A, np.eye(N.n-1))
+        u = np.concatenate(([0, 1], np.random.rand(31)))
+        good = N.derivate()(u).T @ P
+        np.testing.assert_allclose(dC(u), good, atol=1e-9)
+
+def test_derivatecache():
+    N = SplineBaseFunction([0, 0, 0, 0, 0.5, 1, 1, 1, 1])
+    C = SplineCurve(N, np.random.rand(5, 2))
+    assert C.derivate() is C.derivate()
+    ddC = C.derivate().derivate()
+    assert C.derivate().derivate() is ddC
+    C.P = np.random.rand(5, 2)
+    assert C.derivate().derivate() is not ddC
+    u = np.linspace(0, 1, 11)
+    np.testing.assert_allclose(C.derivate().derivate()(u), C.derivatives(u, 2)[2], atol=1e-9)
+    P = np.random.rand(5, 2)
+    C.P = P
+    P[0] = 100
+    np.testing.assert_allclose(C.derivate()(u), C.derivatives(u, 1)[1], atol=1e-9)
+    with pytest.raises(ValueError):
+        C.P[0] = 100
+
+def test_insertknot():
+    N = SplineBaseFunction([0, 0, 0, 0.5, 1, 1, 1])
+    P = np.array([1, 3, 2, 4])
+    C = SplineCurve(N, P)
+    D = C.insert_knot(0.25)
+    assert D.f.U == (0, 0, 0, 0.25, 0.5, 1, 1, 1)
+    assert D.P.shape == (5, )
+    np.testing.assert_allclose(D.P, [1, 2, 2.75, 2, 4])
+    D = C.insert_knot(0.5)
+    assert D.f.U == (0, 0, 0, 0.5, 0.5, 1, 1, 1)
+    u = np.linspace(0, 1, 11)
+    np.testing.assert_allclose(D(u), C(u))
+    with pytest.raises(ValueError):
+        C.insert_knot(0.5, 2)
+    with pytest.raises(ValueError):
+        C.insert_knot(1)
+
+def test_refine():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 6)
+        n = np.random.randint(p+1, p+11)
+        N = SplineBaseFunction(getU_random(n, p))
+        P = np.random.rand(N.n, 3)
+        C = SplineCurve(N, P)
+        X = np.random.rand(20)
+        D = C.refine(X)
+        assert D.f.n == N.n + 20
+        assert D.P.shape == (N.n + 20, 3)
+        u = np.concatenate(([0, 1], X, np.random.rand(31)))
+        np.testing.assert_allclose(D(u), C(u), atol=1e-12)
+
+def test_removeknot():
+    N = SplineBaseFunction([0, 0, 0, 0.5, 1, 1, 1])
+    C = SplineCurve(N, np.array([1, 3, 2, 4]))
+    D = C.insert_knot(0.25).insert_knot(0.5)
+    E = D.remove_knot(0.25).remove_knot(0.5)
+    assert E.f.U == N.U
+    np.testing.assert_allclose(E.P, C.P)
+    E = C.remove_knot(0.5)
+    assert E.f.U == N.U
+    E = C.remove_knot(0.5, tolerance=1.5)
+    assert E.f.U == (0, 0, 0, 1, 1, 1)
+    u = np.linspace(0, 1, 11)
+    assert np.all(np.abs(E(u) - C(u)) <= 1.5)
+    E = C.remove_knot(0.5, times=2, tolerance=10)
+    assert E.f.U == (0, 0, 0, 1, 1, 1)
+    E = D.remove_knot(0.5, times=3)
+    assert E.f.U == (0, 0, 0, 0.25, 0.5, 1, 1, 1)
+    np.testing.assert_allclose(E(u), C(u), atol=1e-12)
+    with pytest.raises(ValueError):
+        C.remove_knot(0.25)
+
+def test_simplify():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 5)
+        n = np.random.randint(p+1, p+8)
+        N = SplineBaseFunction(getU_random(n, p))
+        C = SplineCurve(N, np.random.rand(N.n, 2))
+        D = C.refine(np.random.rand(20))
+        u = np.random.rand(31)
+        E = D.simplify(1e-9)
+        assert E.f.n <= N.n
+        np.testing.assert_allclose(E(u), C(u), atol=1e-9)
+        E = D.simplify(0.05)
+        assert np.all(np.linalg.norm(E(u) - C(u), axis=1) <= 0.05)
+
+def test_reducedegree():
+    N = SplineBaseFunction([0, 0, 0, 0, 0.5, 1, 1, 1, 1])
+    C = SplineCurve(N, [0, 1/6, 1/2, 5/6, 1])
+    R = C.reduce_degree()
+    assert R.f.U == (0, 0, 0, 0.5, 1, 1, 1)
+    np.testing.assert_allclose(R.P, [0, 0.25, 0.75, 1], atol=1e-12)
+    R = R.reduce_degree()
+    assert R.f.U == (0, 0, 0.5, 1, 1)
+    np.testing.assert_allclose(R.P, [0, 0.5, 1], atol=1e-12)
+    C = SplineCurve(N, [0, 1, 0, 1, 0])
+    with pytest.raises(ValueError):
+        C.reduce_degree()
+    R = C.reduce_degree(tolerance=1)
+    u = np.linspace(0, 1, 11)
+    assert np.all(np.abs(R(u) - C(u)) <= 1)
+
+def test_elevatedegree():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 5)
+        n = np.random.randint(p+1, p+8)
+        times = np.random.randint(1, 3)
+        N = SplineBaseFunction(getU_random(n, p))
+        C = SplineCurve(N, np.random.rand(N.n, 2))
+        E = C.elevate_degree(times)
+        assert E.f.p == p + times
+        u = np.concatenate(([0, 1], np.random.rand(31)))
+        np.testing.assert_allclose(E(u), C(u), atol=1e-10)
+    N = SplineBaseFunction([0, 0, 0.5, 1, 1])
+    C = SplineCurve(N, [0, 1, 0])
+    E = C.elevate_degree()
+    assert E.f.U == N.elevate_degree().U
+    assert E.f.U == (0, 0, 0, 0.5, 0.5, 1, 1, 1)
+    np.testing.assert_allclose(E.P, [0, 0.5, 1, 0.5, 0])
+    np.testing.assert_allclose(E.reduce_degree().P, C.P, atol=1e-12)
+
+def test_powerform():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 6)
+        n = np.random.randint(p+1, p+11)
+        N = SplineBaseFunction(getU_random(n, p))
+        C = SplineCurve(N, np.random.rand(N.n, 3))
+        u = np.concatenate(([0, 1], N.U, np.random.rand(31)))
+        np.testing.assert_allclose(C(u, method="power"), C(u), atol=1e-9)
+    N = SplineBaseFunction([0, 0, 0, 0.5, 1, 1, 1])
+    C = SplineCurve(N, np.array([1, 3, 2, 4]))
+    u = np.linspace(0, 1, 11)
+    C.compile()
+    np.testing.assert_allclose(C.horner(u), C(u))
+    P = np.array([4, 2, 3, 1])
+    C.P = P
+    np.testing.assert_allclose(C(u, method="power"), C(u))
+    P[0] = 100
+    np.testing.assert_allclose(C(u, method="power"), C(u))
+    with pytest.raises(ValueError):
+        C.P[0] = 100
+    C.f = SplineBaseFunction([0, 0, 0, 0.25, 1, 1, 1])
+    np.testing.assert_allclose(C(u, method="power"), C(u))
+
+def test_parallel():
+    N = SplineBaseFunction(getU_random(20, 3))
+    C = SplineCurve(N, np.random.rand(N.n, 2))
+    u = np.random.rand(1001)
+    for method in ["basis", "deboor", "power"]:
+        good = C(u, method=method)
+        np.testing.assert_array_equal(C(u, method=method, workers=3, chunksize=100), good)
+    power = C._power
+    C(u, method="power", workers=3)
+    assert C._power is power
+    with ThreadPoolExecutor(2) as executor:
+        np.testing.assert_array_equal(C(u, executor=executor), C(u))
+        np.testing.assert_array_equal(N(u, executor=executor, chunksize=64), N(u))
+        L = N(u, sparse=True, executor=executor)
+        np.testing.assert_array_equal(L.toarray(), N(u))
+    with pytest.raises(ValueError):
+        C(u, workers=0)
+
+def test_batch():
+    N = SplineBaseFunction(getU_random(9, 3))
+    P = np.random.rand(7, N.n, 2)
+    batch = SplineCurveBatch(N, P)
+    assert len(batch) == 7
+    u = np.random.rand(31)
+    values = batch(u)
+    assert values.shape == (7, 31, 2)
+    for k, curve in enumerate(batch):
+        np.testing.assert_allclose(values[k], curve(u))
+    assert np.shares_memory(batch[2].P, batch.P)
+    assert np.shares_memory(batch[1:5].P, batch.P)
+    assert np.shares_memory(batch[[6, 0]][1].P, batch.P)
+    assert np.shares_memory(batch[[6, 0]][[1]][0].P, batch.P)
+    subset = batch[[6, 0, 3]]
+    assert len(subset) == 3
+    np.testing.assert_allclose(subset(u), values[[6, 0, 3]])
+    np.testing.assert_allclose(subset[1:](u), values[[0, 3]])
+    np.testing.assert_allclose(subset[-1](u), values[3])
+    np.testing.assert_allclose(batch[values[:, 0, 0] > 0.5](u), values[values[:, 0, 0] > 0.5])
+    same = SplineCurveBatch.fromcurves([SplineCurve(N, Pk[:, 0]) for Pk in P])
+    np.testing.assert_allclose(same(u), values[:, :, 0])
+    view = P[:]
+    view.setflags(write=False)
+    viewbatch = SplineCurveBatch(N, view)
+    P[0] += 1
+    np.testing.assert_allclose(batch(u), values)
+    np.testing.assert_allclose(viewbatch(u), values)
+    with pytest.raises(ValueError):
+        batch.P[0] = 1
+    with pytest.raises(ValueError):
+        SplineCurveBatch(N, np.random.rand(7, N.n+1, 2))
+    with pytest.raises(ValueError):
+        SplineCurveBatch.fromcurves([batch[0], SplineCurve(SplineBaseFunction(N.U), P[1])])
+
+def main():
+    test_deboor()
+    test_deboor1D()
+    test_derivatives()
+    test_derivatecurve()
+    test_derivatecache()
+    test_insertknot()
+    test_refine()
+    test_removeknot()
+    test_simplify()
+    test_reducedegree()
+    test_elevatedegree()
+    test_powerform()
+    test_parallel()
+    test_batch()
+
+if __name__ == "__main__":
+    main()
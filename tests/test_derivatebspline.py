@@ -1,6 +1,6 @@
 import pytest
 from compmec.nurbs import SplineBaseFunction
-from compmec.nurbs.spaceu import getU_uniform
+from compmec.nurbs.spaceu import getU_uniform, getU_random
 import numpy as np
 
 
@@ -12,9 +12,42 @@ def test_1():
     u = np.linspace(0, 1, 129)
     Nu = N(u)
     dNu = dN(u)
-    
+
+def test_sparse_derivative():
+    n, p = 7, 3
+    U = getU_uniform(n, p)
+    N = SplineBaseFunction(U)
+    u = np.linspace(0, 1, 33)
+    dN = N.derivate()
+    ddN = dN.derivate()
+    assert (dN.A.lower, dN.A.upper) == (0, 1)
+    assert (ddN.A.lower, ddN.A.upper) == (0, 2)
+    np.testing.assert_allclose(dN(u, sparse=True).toarray(), dN(u))
+    np.testing.assert_allclose(ddN(u, sparse=True).toarray(), ddN(u))
+
+def test_evalderivs():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 6)
+        n = np.random.randint(p+1, p+11)
+        N = SplineBaseFunction(getU_random(n, p))
+        u = np.concatenate(([0, 1], np.random.rand(21)))
+        Ls = N.eval_derivs(u, order=p+1)
+        assert len(Ls) == p+2
+        function = N
+        for k in range(p+1):
+            np.testing.assert_allclose(Ls[k], function(u), atol=1e-6)
+            if k < p:
+                function = function.derivate()
+        np.testing.assert_allclose(Ls[p+1], 0)
+        sparse = N.eval_derivs(u, order=2, sparse=True)
+        for k in range(min(p, 2)+1):
+            np.testing.assert_allclose(sparse[k].toarray(), Ls[k])
+
 def main():
     test_1()
+    test_sparse_derivative()
+    test_evalderivs()
 
 if __name__ == "__main__":
     main()
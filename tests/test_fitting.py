@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+from compmec.nurbs import SplineBaseFunction
+from compmec.nurbs.spaceu import getU_uniform
+from compmec.nurbs.fitting import SplineFitter
+
+
+def test_interpolation():
+    n, p = 9, 3
+    U = getU_uniform(n, p)
+    u = np.linspace(0, 1, n)
+    Y = np.random.rand(n, 4)
+    X = SplineFitter(U, u).fit(Y)
+    L = SplineBaseFunction(U)(u)
+    np.testing.assert_allclose(L.T @ X, Y, atol=1e-9)
+    x = SplineFitter(U, u).fit(Y[:, 0])
+    np.testing.assert_allclose(x, X[:, 0])
+
+def test_leastsquares():
+    n, p = 7, 2
+    U = getU_uniform(n, p)
+    u = np.linspace(0, 1, 41)
+    weights = 1 + np.random.rand(len(u))
+    Y = np.random.rand(len(u), 3)
+    X = SplineFitter(U, u, weights).fit(Y)
+    L = SplineBaseFunction(U)(u)
+    good = np.linalg.solve((L * weights) @ L.T, (L * weights) @ Y)
+    np.testing.assert_allclose(X, good, atol=1e-9)
+
+def test_cache():
+    SplineFitter.cache_clear()
+    n, p = 7, 2
+    U = getU_uniform(n, p)
+    u = np.linspace(0, 1, 21)
+    first = SplineFitter(U, u)
+    first.fit(np.random.rand(21))
+    assert SplineFitter.cache_size() == 1
+    second = SplineFitter(U, u.copy())
+    assert second.factorization is first.factorization
+    SplineFitter(U, u, np.ones(21)).fit(np.random.rand(21))
+    assert SplineFitter.cache_size() == 2
+
+def test_cacheLimit():
+    SplineFitter.cache_clear()
+    maxbytes = SplineFitter.cache.maxbytes
+    U = getU_uniform(5, 1)
+    SplineFitter(U, np.linspace(0, 1, 10)).fit(np.random.rand(10))
+    SplineFitter.cache.maxbytes = 3 * SplineFitter.cache.nbytes
+    for i in range(1, 5):
+        u = np.linspace(0, 1, 10)**(i+1)
+        SplineFitter(U, u).fit(np.random.rand(10))
+    assert SplineFitter.cache_size() == 3
+    assert SplineFitter.cache.nbytes <= SplineFitter.cache.maxbytes
+    u = np.linspace(0, 1, 1000)
+    fitter = SplineFitter(U, u)
+    np.testing.assert_allclose(fitter.fit(u), np.linspace(0, 1, 5), atol=1e-12)
+    assert SplineFitter.cache.nbytes <= SplineFitter.cache.maxbytes
+    SplineFitter.cache.maxbytes = maxbytes
+    SplineFitter.cache_clear()
+
+def main():
+    test_interpolation()
+    test_leastsquares()
+    test_cache()
+    test_cacheLimit()
+
+if __name__ == "__main__":
+    main()
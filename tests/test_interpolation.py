@@ -1,4 +1,7 @@
+import pytest
 import numpy as np
+from compmec.nurbs import SplineBaseFunction, SplineXYFunction
+from compmec.nurbs.spaceu import getU_uniform
 from compmec.nurbs.interpolate import curve_spline, function_spline
 from numpy import linalg as la
 
@@ -80,11 +83,57 @@ def test_functionXYsin():
     L2y = la.norm(ysuposed - yplot)
     assert L2y < 0.2
 
+def test_functionXYinverse():
+    p = 3
+    x = np.linspace(0, 2, 15)**2
+    y = np.cos(x)
+    F = function_spline(x, y, p)
+    xtest = np.concatenate(([0, 4], 4*np.random.rand(1000)))
+    for tolerance in (1e-6, 1e-12):
+        F.tolerance = tolerance
+        u = F.inverse(xtest)
+        assert np.all(np.abs(F.xvalues(u) - xtest) <= tolerance*4)
+    np.testing.assert_allclose(F(x), y, atol=1e-9)
+
+def test_functionXYdecreasing():
+    N = SplineBaseFunction(getU_uniform(6, 2))
+    X = [5, 4, 3, 2, 1, 0]
+    Y = np.random.rand(6)
+    F = SplineXYFunction(N, X, Y)
+    u = np.linspace(0, 1, 33)
+    xtest = N(u).T @ X
+    np.testing.assert_allclose(F.inverse(xtest), u, atol=1e-9)
+    np.testing.assert_allclose(F(xtest), N(u).T @ Y, atol=1e-9)
+
+def test_functionXYmonotone():
+    N = SplineBaseFunction([0, 0, 0, 1, 1, 1])
+    SplineXYFunction(N, [0, 1, 1.5], [0, 1, 2])
+    M = SplineBaseFunction([0, 0, 0, 0, 1, 1, 1, 1])
+    SplineXYFunction(M, [0, 2, 1.9, 3], [0, 1, 2, 3])  # Not monotone control points
+    with pytest.raises(ValueError):
+        SplineXYFunction(N, [0, 2, 1], [0, 1, 2])
+    with pytest.raises(ValueError):
+        SplineXYFunction(N, [0, 2, -1], [0, 1, 2])
+
+def test_functionXYsamples():
+    N = SplineBaseFunction(getU_uniform(7, 3))
+    X = np.cumsum(np.random.rand(7))
+    F = SplineXYFunction(N, X, np.random.rand(7))
+    assert np.all(np.diff(F.usample) > 0)
+    assert np.all(np.diff(F.xsample) > 0)
+    np.testing.assert_allclose(F.xsample, N(F.usample).T @ X)
+    for knot in set(N.U):
+        assert knot in F.usample
+
 def main():
     test_functionspline_smallpolynomials()
     test_curvespline_pointsinterpolation()
     test_curvespline_derivativeinterpolation()
     test_functionXYsin()
+    test_functionXYinverse()
+    test_functionXYdecreasing()
+    test_functionXYmonotone()
+    test_functionXYsamples()
 
 if __name__ == "__main__":
     main()
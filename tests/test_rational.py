@@ -0,0 +1,139 @@
+import pytest
+import numpy as np
+from compmec.nurbs import SplineBaseFunction, RationalBaseFunction, RationalCurve, RationalXYFunction
+from compmec.nurbs.basefunctions import R
+from compmec.nurbs.spaceu import getU_random
+
+
+def test_unitweights():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 5)
+        n = np.random.randint(p+1, p+11)
+        U = getU_random(n, p)
+        N = SplineBaseFunction(U)
+        Rf = RationalBaseFunction(U)
+        u = np.random.rand(11)
+        np.testing.assert_allclose(Rf(u), N(u))
+
+def test_partitionunity():
+    ntests = 10
+    for i in range(ntests):
+        p = np.random.randint(0, 5)
+        n = np.random.randint(p+1, p+11)
+        U = getU_random(n, p)
+        Rf = RationalBaseFunction(U)
+        Rf.w = 0.5 + np.random.rand(Rf.n)
+        u = np.concatenate(([0, 1], np.random.rand(11)))
+        for j in range(p+1):
+            M = Rf[:, j](u)
+            assert np.all(M >= 0)
+            np.testing.assert_allclose(np.sum(M, axis=0), 1)
+        np.testing.assert_allclose(Rf(u, sparse=True).toarray(), Rf(u))
+
+def test_scalarR():
+    U = [0, 0, 0, 0.5, 1, 1, 1]
+    w = [1, 2, 0.5, 1]
+    Rf = RationalBaseFunction(U, w)
+    u = np.linspace(0, 1, 11)
+    M = Rf(u)
+    for m, um in enumerate(u):
+        k = Rf[:, 2].U.spot(um)
+        for i in range(Rf.n):
+            np.testing.assert_almost_equal(R(i, 2, k, um, Rf[:, 2].U, w), M[i, m])
+
+def test_circle():
+    w = [1, np.sqrt(2)/2, 1]
+    Rf = RationalBaseFunction([0, 0, 0, 1, 1, 1], w)
+    P = np.array([[1, 0], [1, 1], [0, 1]])
+    C = RationalCurve(Rf, P)
+    u = np.linspace(0, 1, 129)
+    radius = np.linalg.norm(C(u), axis=1)
+    np.testing.assert_allclose(radius, 1)
+
+def test_rationalXY():
+    w = [1, 3, 1]
+    Rf = RationalBaseFunction([0, 0, 0, 1, 1, 1], w)
+    F = RationalXYFunction(Rf, [0, 1, 2], [0, 1, 0])
+    u = np.linspace(0, 1, 11)
+    x = Rf(u).T @ [0, 1, 2]
+    np.testing.assert_allclose(F(x), Rf(u).T @ [0, 1, 0], atol=1e-9)
+
+def test_homogeneous():
+    U = [0, 0, 0, 0.5, 1, 1, 1]
+    w = [1, 0.5, 2, 1]
+    Rf = RationalBaseFunction(U, w)
+    P = np.random.rand(4, 3)
+    C = RationalCurve(Rf, P)
+    np.testing.assert_allclose(C.Pw[:, :3], np.array(w)[:, None] * P)
+    np.testing.assert_allclose(C.Pw[:, 3], w)
+    u = np.linspace(0, 1, 11)
+    np.testing.assert_allclose(C(u), Rf(u).T @ P)
+    assert C.Pw is C.Pw
+    P[0] = 100
+    np.testing.assert_allclose(C(u), Rf(u).T @ C.P)
+    Rf.w = [2, 1, 1, 3]
+    np.testing.assert_allclose(C.Pw[:, 3], [2, 1, 1, 3])
+    np.testing.assert_allclose(C(u), Rf(u).T @ C.P)
+    with pytest.raises(ValueError):
+        C.P[0] = 100
+    with pytest.raises(ValueError):
+        Rf.w[0] = 100
+
+def test_derivatives():
+    U = [0, 0, 0, 0, 0.5, 1, 1, 1, 1]
+    w = [1, 0.5, 2, 1, 3]
+    Rf = RationalBaseFunction(U, w)
+    P = np.random.rand(5, 2)
+    C = RationalCurve(Rf, P)
+    dC = C.derivate()
+    ddC = dC.derivate()
+    u = np.array([0.1, 0.2, 0.3, 0.6, 0.7, 0.9])
+    h = 1e-5
+    np.testing.assert_allclose(dC(u), (C(u+h) - C(u-h))/(2*h), atol=1e-5)
+    np.testing.assert_allclose(ddC(u), (dC(u+h) - dC(u-h))/(2*h), atol=1e-4)
+    with pytest.raises(TypeError):
+        Rf.derivate()
+
+def test_circletangent():
+    w = [1, np.sqrt(2)/2, 1]
+    Rf = RationalBaseFunction([0, 0, 0, 1, 1, 1], w)
+    P = np.array([[1, 0], [1, 1], [0, 1]])
+    C = RationalCurve(Rf, P)
+    u = np.linspace(0, 1, 33)
+    inner = np.sum(C(u) * C.derivate()(u), axis=1)
+    np.testing.assert_allclose(inner, 0, atol=1e-12)
+
+def test_invalidweights():
+    with pytest.raises(ValueError):
+        RationalBaseFunction([0, 0, 1, 1], [1, -1])
+    with pytest.raises(ValueError):
+        RationalBaseFunction([0, 0, 1, 1], [1, 1, 1])
+
+def test_elevatecircle():
+    w = [1, np.sqrt(2)/2, 1]
+    Rf = RationalBaseFunction([0, 0, 0, 1, 1, 1], w)
+    C = RationalCurve(Rf, np.array([[1, 0], [1, 1], [0, 1]]))
+    E = C.elevate_degree(2)
+    assert E.f.p == 4
+    assert E.f.U == (0, 0, 0, 0, 0, 1, 1, 1, 1, 1)
+    u = np.linspace(0, 1, 129)
+    np.testing.assert_allclose(E(u), C(u), atol=1e-12)
+    np.testing.assert_allclose(np.linalg.norm(E(u), axis=1), 1)
+    with pytest.raises(ValueError):
+        C.derivate().elevate_degree()
+
+def main():
+    test_unitweights()
+    test_partitionunity()
+    test_scalarR()
+    test_circle()
+    test_rationalXY()
+    test_homogeneous()
+    test_derivatives()
+    test_circletangent()
+    test_invalidweights()
+    test_elevatecircle()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import pytest
 import numpy as np
-from compmec.nurbs.approx import curve_spline
+from compmec.nurbs import SplineBaseFunction, SplineCurve
+from compmec.nurbs.spaceu import getU_uniform
+from compmec.nurbs.approx import curve_spline, curve_control_points, compute_control_points, transform2U
 from numpy import linalg as la
 
 
@@ -37,8 +40,49 @@ def test_curvecossin():
     print("Error L2 y = %.3f" % L2y)
 
 
+def test_sparsemethods():
+    p = 3
+    N = SplineBaseFunction(getU_uniform(12, p))
+    t = np.linspace(0, 1, 201)
+    points = np.array([np.cos(3*t), np.sin(3*t), t])
+    weights = 1 + np.random.rand(len(t))
+    L = N(t, sparse=True)
+    Ldense = N(t)
+    good = compute_control_points(Ldense, points.T, weights)
+    cholesky = compute_control_points(L, points.T, weights, method="cholesky")
+    lsqr = compute_control_points(L, points.T, weights, method="lsqr")
+    np.testing.assert_allclose(cholesky, good, atol=1e-9)
+    np.testing.assert_allclose(lsqr, good, atol=1e-9)
+    np.testing.assert_allclose(curve_control_points(L, points, weights), good, atol=1e-9)
+
+def test_lsqrconvergence():
+    M, n, p = 2000, 200, 3
+    t = np.sort(np.random.rand(M))
+    t[0], t[-1] = 0, 1
+    L = SplineBaseFunction(transform2U(t, n, p))(t, sparse=True)
+    y = np.sin(20*t) + 0.01*np.random.rand(M)
+    good = la.lstsq(L.toarray().T, y, rcond=None)[0]
+    lsqr = compute_control_points(L, y, method="lsqr")
+    np.testing.assert_allclose(lsqr, good, atol=1e-5)
+    with pytest.raises(la.LinAlgError):
+        compute_control_points(L, y, method="lsqr", maxiter=10)
+
+def test_weightedfit():
+    p = 2
+    N = SplineBaseFunction(getU_uniform(8, p))
+    t = np.linspace(0, 1, 51)
+    y = np.sin(3*t)
+    weights = np.ones(len(t))
+    weights[10] = 1e+6
+    X = compute_control_points(N(t, sparse=True), y, weights)
+    F = SplineCurve(N, X)
+    assert abs(F(t[10])[0] - y[10]) < 1e-6
+
 def main():
     test_curvecossin()
+    test_sparsemethods()
+    test_lsqrconvergence()
+    test_weightedfit()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+import pytest
+import numpy as np
+from numpy import linalg as la
+from compmec.nurbs.solvers import bandwidths, banded_lu, banded_lu_solve, solve_rows
+from compmec.nurbs.solvers import banded_cholesky, banded_cholesky_solve, lsqr, BandedMatrix
+
+
+def test_bandwidths():
+    starts = [0, 0, 1, 2, 3]
+    assert bandwidths(starts, 2) == (1, 1)
+    starts = [0, 0, 0, 1, 2, 3]
+    assert bandwidths(starts, 3) == (2, 2)
+
+def test_bandedLU():
+    ntests = 10
+    n, width = 30, 4
+    for i in range(ntests):
+        starts = np.arange(n) - np.random.randint(0, width, n)
+        starts = np.clip(starts, 0, n-width)
+        values = np.random.rand(n, width) - 0.5
+        A = np.zeros((n, n))
+        A[np.arange(n)[:, None], starts[:, None] + np.arange(width)] = values
+        B = np.random.rand(n, 3)
+        X = banded_lu_solve(banded_lu(starts, values), B)
+        np.testing.assert_allclose(A @ X, B, atol=1e-9)
+        X = banded_lu_solve(banded_lu(starts, values), B[:, 0])
+        np.testing.assert_allclose(A @ X, B[:, 0], atol=1e-9)
+
+def test_solveUnsortedRows():
+    n, width = 20, 3
+    starts = np.clip(np.arange(n)-1, 0, n-width)
+    values = np.random.rand(n, width) + 1
+    A = np.zeros((n, n))
+    A[np.arange(n)[:, None], starts[:, None] + np.arange(width)] = values
+    B = np.random.rand(n, 2)
+    order = np.random.permutation(n)
+    X = solve_rows(starts[order], values[order], B[order])
+    np.testing.assert_allclose(A @ X, B, atol=1e-9)
+
+def test_singular():
+    starts = [0, 0, 1, 2, 3, 4]
+    values = np.ones((6, 2))
+    values[2] = 0
+    with pytest.raises(la.LinAlgError):
+        banded_lu(starts, values)
+
+def test_bandedCholesky():
+    n, b = 30, 3
+    A = np.random.rand(n, n)
+    G = A @ A.T + n*np.eye(n)
+    G[np.abs(np.arange(n)[:, None] - np.arange(n)) > b] = 0
+    Gb = np.zeros((b+1, n))
+    for d in range(b+1):
+        Gb[d, :n-d] = np.diag(G, -d)
+    B = np.random.rand(n, 3)
+    X = banded_cholesky_solve(banded_cholesky(Gb), B)
+    np.testing.assert_allclose(G @ X, B, atol=1e-9)
+    with pytest.raises(la.LinAlgError):
+        banded_cholesky(-Gb)
+
+def test_lsqr():
+    M, n = 50, 10
+    A = np.random.rand(M, n)
+    b = np.random.rand(M, 2)
+    X = lsqr(lambda x: A @ x, lambda y: A.T @ y, b)
+    good = la.lstsq(A, b, rcond=None)[0]
+    np.testing.assert_allclose(X, good, atol=1e-8)
+
+def test_bandedMatrix():
+    n = 9
+    for lower, upper in [(0, 0), (0, 2), (1, 1), (2, 0)]:
+        A = np.random.rand(n, n)
+        A[np.arange(n)[:, None] - np.arange(n) > lower] = 0
+        A[np.arange(n) - np.arange(n)[:, None] > upper] = 0
+        B = np.triu(np.tril(np.random.rand(n, n), 1))
+        bA = BandedMatrix.fromarray(A)
+        assert (bA.lower, bA.upper) == (lower, upper)
+        np.testing.assert_allclose(bA.toarray(), A)
+        np.testing.assert_allclose(bA.T.toarray(), A.T)
+        X = np.random.rand(n, 2)
+        np.testing.assert_allclose(bA @ X, A @ X)
+        np.testing.assert_allclose(bA.T @ X, A.T @ X)
+        np.testing.assert_allclose((bA @ BandedMatrix.fromarray(B)).toarray(), A @ B)
+    identity = BandedMatrix.identity(n)
+    assert identity.isidentity
+    np.testing.assert_allclose(identity.toarray(), np.eye(n))
+
+def main():
+    test_bandwidths()
+    test_bandedLU()
+    test_solveUnsortedRows()
+    test_singular()
+    test_bandedCholesky()
+    test_lsqr()
+    test_bandedMatrix()
+
+if __name__ == "__main__":
+    main()
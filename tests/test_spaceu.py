@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from compmec.nurbs import VectorU
+from compmec.nurbs import VectorU, SplineBaseFunction
 
 
 def test_CreationClass():
@@ -24,6 +24,12 @@ def test_FailCreationClass():
         VectorU([-1, -1, 1, 1])
         VectorU([0, 0, 2, 2])
 
+def test_FailUnordenedVector():
+    with pytest.raises(ValueError):
+        VectorU([0, 0, 0.7, 0.3, 1, 1])
+    with pytest.raises(ValueError):
+        SplineBaseFunction([0, 0, 0, 0.7, 0.3, 1, 1, 1])
+
 def test_ValuesOfP():
     V = VectorU([0, 0, 1, 1])
     assert V.p == 1
@@ -88,11 +94,64 @@ def test_findSpots():
     correctspots = [1, 1, 2, 2, 3, 4, 5, 5, 6, 6, 7]
     np.testing.assert_equal(suposedspots, correctspots)
 
+def test_findSpotsArrayLike():
+    U = VectorU([0, 0, 0, 0.25, 0.25, 0.5, 1, 1, 1]) # p = 2, n = 6
+    spots = U.spot([0, 0.1, 0.25, 0.3, 0.5, 0.99, 1])
+    assert spots.dtype.kind == "i"
+    np.testing.assert_equal(spots, [2, 2, 4, 4, 5, 5, 6])
+    spots = U.spot(np.array([[0, 0.3], [0.7, 1]]))
+    np.testing.assert_equal(spots, [[2, 4], [5, 6]])
+    u = np.random.rand(100)
+    for ui, k in zip(u, U.spot(u)):
+        assert U[k] <= ui < U[k+1]
+
+def test_CachedStructure():
+    U = VectorU([0, 0, 0, 0.25, 0.25, 0.5, 1, 1, 1]) # p = 2, n = 6
+    np.testing.assert_equal(U.knots, [0, 0.25, 0.5, 1])
+    np.testing.assert_equal(U.mults, [3, 2, 1, 3])
+    np.testing.assert_equal(U.spans, [2, 4, 5])
+    assert U.umin == 0
+    assert U.umax == 1
+    assert U.array.dtype == np.float64
+    with pytest.raises(ValueError):
+        U.array[0] = 1
+    with pytest.raises(AttributeError):
+        U.newattribute = 1
+    assert len(U) == 9
+    assert U[3] == 0.25
+    assert list(U) == [0, 0, 0, 0.25, 0.25, 0.5, 1, 1, 1]
+
+def test_TrustedCreation():
+    U = VectorU([0, 0, 0, 0.5, 1, 1, 1])
+    V = VectorU.trusted(np.array([0, 0, 0, 0.5, 1, 1, 1]))
+    assert U == V
+    assert hash(U) == hash(V)
+    assert V.p == 2
+    assert V.n == 4
+
+def test_ValidationOnlyOnce():
+    U = VectorU([0, 0, 0, 0.5, 1, 1, 1], validate=False)
+    assert U.p == 2
+    with pytest.raises(TypeError):
+        VectorU([[0, 0], [1, 1]])
+    with pytest.raises(TypeError):
+        VectorU([0, 0, "a", 1, 1])
+    N = SplineBaseFunction(U)
+    assert N[2, 2]._U is U
+    assert N[:, 1]._U is U
+    np.testing.assert_allclose(N([0, 0.5, 1]), N(np.array([0, 0.5, 1])))
+
 def main():
     test_CreationClass()
     test_FailCreationClass()
+    test_FailUnordenedVector()
     test_ValuesOfP()
     test_ValuesOfN()
+    test_findSpots()
+    test_findSpotsArrayLike()
+    test_CachedStructure()
+    test_TrustedCreation()
+    test_ValidationOnlyOnce()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
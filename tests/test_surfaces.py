@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+from compmec.nurbs import SplineBaseFunction, SplineCurve, SplineSurface, RationalSurface
+from compmec.nurbs.spaceu import getU_random
+
+
+def test_grid():
+    ntests = 10
+    for i in range(ntests):
+        p, q = np.random.randint(0, 5, 2)
+        Nu = SplineBaseFunction(getU_random(np.random.randint(p+1, p+8), p))
+        Nv = SplineBaseFunction(getU_random(np.random.randint(q+1, q+8), q))
+        P = np.random.rand(Nu.n, Nv.n, 3)
+        S = SplineSurface(Nu, Nv, P)
+        u = np.concatenate(([0, 1], np.random.rand(11)))
+        v = np.concatenate(([0, 1], np.random.rand(7)))
+        good = np.einsum("ai,bj,abd->ijd", Nu(u), Nv(v), P)
+        values = S(u, v)
+        assert values.shape == (len(u), len(v), 3)
+        np.testing.assert_allclose(values, good, atol=1e-12)
+
+def test_scattered():
+    ntests = 10
+    for i in range(ntests):
+        p, q = np.random.randint(0, 5, 2)
+        Nu = SplineBaseFunction(getU_random(np.random.randint(p+1, p+8), p))
+        Nv = SplineBaseFunction(getU_random(np.random.randint(q+1, q+8), q))
+        S = SplineSurface(Nu, Nv, np.random.rand(Nu.n, Nv.n, 2))
+        u, v = np.random.rand(2, 17)
+        values = S(u, v, grid=False)
+        assert values.shape == (17, 2)
+        grid = S(u, v)
+        np.testing.assert_allclose(values, grid[np.arange(17), np.arange(17)], atol=1e-12)
+    with pytest.raises(ValueError):
+        S([0, 0.5], [0.5], grid=False)
+
+def test_curveonsurface():
+    Nu = SplineBaseFunction([0, 0, 0, 0.5, 1, 1, 1])
+    Nv = SplineBaseFunction([0, 0, 1, 1])
+    P = np.random.rand(4, 2)
+    S = SplineSurface(Nu, Nv, np.stack((P, P), axis=1))
+    u = np.linspace(0, 1, 11)
+    values = S(u, [0, 0.3, 1])
+    for j in range(3):
+        np.testing.assert_allclose(values[:, j], SplineCurve(Nu, P)(u))
+    with pytest.raises(ValueError):
+        SplineSurface(Nu, Nv, P[:3])
+
+def test_sphereoctant():
+    Nu = SplineBaseFunction([0, 0, 0, 1, 1, 1])
+    Nv = SplineBaseFunction([0, 0, 0, 1, 1, 1])
+    r2 = np.sqrt(2)/2
+    P = np.array([[[1, 0, 0], [1, 1, 0], [0, 1, 0]],
+                  [[1, 0, 1], [1, 1, 1], [0, 1, 1]],
+                  [[0, 0, 1], [0, 0, 1], [0, 0, 1]]])
+    w = np.array([[1, r2, 1], [r2, 0.5, r2], [1, r2, 1]])
+    S = RationalSurface(Nu, Nv, P, w)
+    u = np.linspace(0, 1, 17)
+    np.testing.assert_allclose(np.linalg.norm(S(u, u), axis=2), 1)
+    np.testing.assert_allclose(np.linalg.norm(S(u, u[::-1], grid=False), axis=1), 1)
+    Nuu, Nvv = Nu(u), Nv(u[::-1])
+    weight = np.einsum("am,bm,ab->m", Nuu, Nvv, w)
+    good = np.einsum("am,bm,ab,abd->md", Nuu, Nvv, w, P) / weight[:, None]
+    np.testing.assert_allclose(S(u, u[::-1], grid=False), good)
+    np.testing.assert_allclose(S(u, u[::-1])[np.arange(17), np.arange(17)], good)
+    S.w = np.ones((3, 3))
+    np.testing.assert_allclose(S(u, u), SplineSurface(Nu, Nv, P)(u, u))
+    np.testing.assert_allclose(S(u, u, grid=False), SplineSurface(Nu, Nv, P)(u, u, grid=False))
+    with pytest.raises(ValueError):
+        S.w = np.ones((2, 3))
+
+def main():
+    test_grid()
+    test_scattered()
+    test_curveonsurface()
+    test_sphereoctant()
+
+if __name__ == "__main__":
+    main()